@@ -5,13 +5,27 @@ TURBO версия: REST-based Pump Detector
 
 import asyncio
 import aiohttp
+import math
+import msgspec
+import numpy as np
+import orjson
+import re
+import secrets
+import signal
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List
-from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+from array import array
+from collections import deque
+from functools import lru_cache
+from itertools import islice
 import yaml
 
-from telegram import Update
-from telegram.ext import Application, CommandHandler, ContextTypes
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, Forbidden, NetworkError, RetryAfter, TimedOut
+from telegram.request import HTTPXRequest
+from telegram.ext import AIORateLimiter, Application, CommandHandler, ContextTypes
 from database import Database
 from signal_generator import SignalGenerator
 from coin_profiler import CoinProfiler
@@ -24,20 +38,154 @@ from open_interest_analyzer import OpenInterestAnalyzer
 from funding_rate_analyzer import FundingRateAnalyzer
 from liquidation_heatmap import LiquidationHeatmap, get_liq_heatmap
 from god_brain import GodBrain, get_god_brain
-from ml_predictor import MLPredictor, get_ml_predictor
+from score_kernels import aggregate_scores, pct_diffs
+from ml_predictor import MLPredictor, get_ml_predictor, ML_FEATURE_ORDER
 from trailing_tp import TrailingTPTracker, get_trailing_tracker
+from depth_stream import MexcDepthStream
+from pump_prefilter import PumpPrefilter
 from advanced_analyzers import (
     MultiTimeframeAnalyzer, get_mtf_analyzer,
     VolumeProfileAnalyzer, get_volume_analyzer,
     CrossPairAnalyzer, get_cross_pair_analyzer
 )
 
+try:
+    from announcement_parser import AnnouncementParser
+except ImportError:
+    AnnouncementParser = None
+
 logger = setup_logging()
 
 
+# Фейковый сигнал для /test (константа - сообщение рендерится один раз)
+_FAKE_SIGNAL = {
+    "symbol": "TEST/USDT",
+    "entry_price": 0.045,
+    "quality_score": 9.5,
+    "raw_quality_score": 9.5,
+    "reliability_score": 8.5,
+    "pump_increase_pct": 23.5,
+    "factors": {
+        "divergence_score": 7,
+        "volume_drop_pct": 65,
+        "orderbook_score": 8,
+        "rsi_value": 78,
+        "funding_score": 5,
+        "mtf_score": 0,
+        "whale_score": 8,
+        "dex_score": 10,
+        "dex_spread_pct": 16.88
+    },
+    "dex_data": {
+        "price": 0.0385,
+        "dex_name": "Uniswap",
+        "chain": "ethereum",
+        "liquidity": 500000
+    },
+    "whale_data": {"whale_sells_appeared": True}
+}
+
+
+class OrjsonHTTPXRequest(HTTPXRequest):
+    """HTTPXRequest с разбором ответов Telegram через orjson"""
+    
+    @staticmethod
+    def parse_json_payload(payload: bytes) -> Dict:
+        try:
+            return orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            # Невалидный ответ - пусть PTB выдаст своё стандартное исключение
+            return HTTPXRequest.parse_json_payload(payload)
+
+
+class MexcKline(msgspec.Struct):
+    """Минутная свеча MEXC (поля как в ответе API)"""
+    time: int
+    open: float
+    high: float
+    low: float
+    close: float
+    vol: float
+
+
+class _KlinesResponse(msgspec.Struct):
+    success: bool = False
+    data: List[MexcKline] = []
+
+
+# Типизированный разбор в C: строки-числа приводятся к float (strict=False)
+_KLINES_DECODER = msgspec.json.Decoder(_KlinesResponse, strict=False)
+
+
+def _parse_klines_rows(body: bytes) -> Optional[List[MexcKline]]:
+    """
+    Запасной разбор свечей по строкам: битые строки пропускаются,
+    а не роняют весь ответ. None - если сам ответ неуспешный/не той формы.
+    """
+    data = orjson.loads(body)
+    if not isinstance(data, dict) or not data.get('success') or not isinstance(data.get('data'), list):
+        return None
+    klines = []
+    for row in data['data']:
+        try:
+            klines.append(msgspec.convert(row, MexcKline, strict=False))
+        except msgspec.ValidationError:
+            continue
+    return klines
+
+
+# /announce в тексте MarkdownV2: '_' в имени бота там уже экранирован ('\_')
+_ANNOUNCE_RE = re.compile(r'^/announce(?:@[\w\\]+)?\s*', re.IGNORECASE)
+_MD2_SPECIAL_RE = re.compile(r'([_*\[\]()~`>#+\-=|{}.!\\])')
+
+
+@lru_cache(maxsize=4096)
+def _esc_md2(text: str) -> str:
+    """Экранирование динамического текста для MarkdownV2 (кэшируется)"""
+    return _MD2_SPECIAL_RE.sub(r'\\\1', text)
+
+
+@lru_cache(maxsize=512)
+def _link_keyboard(*links: Tuple[str, str]) -> InlineKeyboardMarkup:
+    """Клавиатура из кнопок-ссылок (label, url), по кнопке в ряд. Объекты PTB неизменяемы - кешируем"""
+    return InlineKeyboardMarkup([[InlineKeyboardButton(label, url=url)] for label, url in links])
+
+
+# Шаблон ежедневного отчёта, MarkdownV2 (заполняется через format_map)
+_DAILY_TEMPLATE = """
+📊 *ЕЖЕДНЕВНЫЙ ОТЧЁТ*
+━━━━━━━━━━━━━━━
+
+🚀 Пампов обнаружено: `{pumps}`
+🎯 Сигналов отправлено: `{signals}`
+
+📈 *Результаты:*
+✅ WIN: `{wins}`
+❌ LOSS: `{losses}`
+📊 Win Rate: *{wr}%*
+
+💰 Средний профит: `{avg_profit:.1f}%`
+🎲 Активных трекингов: `{active}`
+"""
+
+
+# Шаблон уведомления о пампе, Markdown (разбирается один раз, на пампе - только подстановка)
+_PUMP_TEMPLATE = """
+◈ *Pump Detected*
+
+`{symbol}`
++{increase_pct:.1f}% in {actual_time:.1f}m
+`{price_start:.8f}` ➔ `{price_peak:.8f}`
+
+_Analyzing..._
+"""
+
+
 class RestPumpDetector:
     """REST-based детектор пампов (TURBO mode)"""
     
+    _TEST_MSG: Optional[str] = None  # Кэш отрендеренного /test сообщения
+    
     def __init__(self, config_path: str = "config.yaml"):
         # Загрузка конфигурации
         with open(config_path, 'r', encoding='utf-8') as f:
@@ -63,21 +211,39 @@ class RestPumpDetector:
         self.telegram_token = self.config['telegram']['bot_token']
         self.chat_id = self.config['telegram']['chat_id']
         self.topic_id = self.config['telegram'].get('topic_id')  # ID темы в группе
+        
+        # Webhook (push) вместо getUpdates polling, если задан публичный URL
+        self.webhook_url = self.config['telegram'].get('webhook_url') or ''
+        self.use_webhook = bool(self.webhook_url)
+        self.webhook_listen = self.config['telegram'].get('webhook_listen', '0.0.0.0')
+        self.webhook_port = self.config['telegram'].get('webhook_port', 8443)
+        self.webhook_secret = secrets.token_urlsafe(24)  # Путь + X-Telegram-Bot-Api-Secret-Token
         self.app = None
         
         # REST API
         self.rest_url = self.config['mexc']['rest_endpoint']
+        self._url_detail = f"{self.rest_url}/api/v1/contract/detail"
+        self._url_ticker = f"{self.rest_url}/api/v1/contract/ticker"
+        self._url_btc_ticker = f"{self.rest_url}/api/v1/contract/ticker?symbol=BTC_USDT"
+        self._url_depth_tmpl = self.rest_url + "/api/v1/contract/depth/{}"
+        self._url_kline_tmpl = self.rest_url + "/api/v1/contract/kline/{}"
+        self._url_funding_tmpl = self.rest_url + "/api/v1/contract/funding_rate/{}"
         
-        # Persistent HTTP session
+        # Persistent HTTP session (создаётся один раз в start_session)
         self.session: aiohttp.ClientSession = None
-        self.connector = aiohttp.TCPConnector(
-            limit=100,
-            limit_per_host=50,
-            keepalive_timeout=30
+        
+        # 📡 WS-стакан для монет в анализе (вместо REST /depth на каждый сигнал)
+        self.depth_stream = MexcDepthStream(
+            ws_url=self.config['mexc']['ws_endpoint'],
+            rest_url=self.rest_url,
+            ping_interval=self.config['mexc'].get('ping_interval', 15)
         )
         
         # Хранилище данных
-        self.price_snapshots = defaultdict(list)
+        # Кольцевой буфер на монету: старые снимки вытесняются за O(1), без пересборки списка
+        self.snapshot_window_ms = 40 * 60 * 1000  # окно 40 минут для обоих типов пампов
+        # Обычный dict: буферы заводятся заранее в run(), новые листинги - явно в scan_market
+        self.price_snapshots = {}
         self.last_prices = {}
         
         # Статистика
@@ -86,16 +252,47 @@ class RestPumpDetector:
         self.scan_count = 0
         
         # Cooldown
+        # Значения - time.monotonic() (сек): длительность без datetime в горячем цикле
         self.pump_cooldown = {}
         self.signal_cooldown = {}
+        self.signal_cooldown_seconds = 20 * 60  # Повторный сигнал по монете не раньше чем через 20 мин
+        self.listing_refresh_interval = 30  # сек: фоновое обновление /listing
+        self.listing_cache_ttl = 60         # сек: старше - /listing собирает заново
+        self._listing_cache = (0.0, None)   # (monotonic ts, текст /listing)
+        self._last_edit_hash = {}  # message_id -> hash последнего текста (не редактируем тем же самым)
         self.active_analyses = set()  # Множество активных задач анализа (чтобы не запускать дубли)
+        self._analysis_sem = asyncio.Semaphore(8)  # Не больше 8 одновременных анализов (лимиты MEXC)
+        self._inflight = {}  # symbol -> asyncio.Future текущего analyze_and_generate_signal
+        self._background_tasks = set()  # Сильные ссылки на фоновые задачи анализа - иначе их соберёт GC
+        # Алерты о пампах: скан кладёт в очередь, отправляет одна задача. Темп группы 20/мин
+        # выдерживает лимитер, и ждёт в нём только отправитель. 20 = минута отставания;
+        # сверх неё алерт уже неактуален и отбрасывается
+        self._alert_queue: asyncio.Queue = asyncio.Queue(maxsize=20)
         self.last_notified_peak = {}  # symbol -> last peak price we notified about
         self.last_notified_type = {}  # symbol -> last pump type (MICRO/FAST/MASSIVE)
         self.logged_pumps = {}  # symbol -> timestamp of last log (to prevent spam)
         self.cooldown_minutes = 0  # 🚀 INSTANT: Без cooldown - мгновенные уведомления!
+        self.cooldown_seconds = self.cooldown_minutes * 60
         self.repeat_pump_threshold = self.config['pump_detection'].get('repeat_signal_threshold', 10.0)  # 📢 Повторный сигнал при +10% от пика
         self.no_signal_cooldown = {}  # Cooldown для уведомлений "ТВХ не найдена"
         
+        # ⚡ TTL-кеши: BTC 24h меняется за минуты, funding - раз в 8ч
+        self.btc_cache_ttl = 30        # сек
+        self.funding_cache_ttl = 300   # сек
+        self._btc_cache = (0.0, None)  # (monotonic ts, (btc_score, btc_emoji))
+        self._funding_cache = {}       # symbol -> (monotonic ts, (funding_score, funding_emoji))
+        self._ticker_cache = {}        # symbol -> 24h изменение (доля) из последнего скана (get_ticker_batch)
+        self._ticker_cache_at = 0.0    # monotonic ts последнего скана
+        self.klines_cache_ttl = 30     # сек: instant-путь и анализ берут свечи в одну и ту же секунду
+        self._klines_cache = {}        # symbol -> (monotonic ts, limit, raw klines)
+        self._bars_cache = {}          # symbol -> (начало незакрытой минуты ms, [закрытые минутные свечи из снапшотов])
+        self.symbols_cache_ttl = 600   # сек: список контрактов MEXC
+        self._symbols_cache = (0.0, None)  # (monotonic ts, [symbols])
+        
+        # ⏱️ Лимит на один запрос сигнального пути: медленный эндпоинт
+        # не должен держать весь gather - его метрика просто остаётся 5.0
+        self.request_timeout = aiohttp.ClientTimeout(total=1.5)
+        
         # 🚀 ПАРАМЕТРЫ ДЕТЕКЦИИ ПАМПОВ
         # FAST PUMP: 10%+ за ≤5 минут (ювелирные быстрые пампы)
         self.fast_pump_pct = self.config['pump_detection']['fast_pump']['min_increase_pct']
@@ -106,7 +303,20 @@ class RestPumpDetector:
         self.elite_pump_timeframe = self.config['pump_detection']['elite_pump']['max_timeframe_minutes']
         
         self.scan_interval = 0.05  # 🚀 TURBO MAX++: 0.05 сек (20 сканов/сек!)
+        self.max_scan_backoff = 5.0  # сек: потолок паузы между сканами при ошибках MEXC
+        self._scan_failures = 0      # неудачных сканов подряд
         
+        # 📐 Векторный отбор кандидатов: detect_pump только для монет, где рост в окне возможен.
+        # Порог - половина минимального, чтобы DEBUG "близко к пампу" тоже не терялся
+        self.pump_prefilter = PumpPrefilter(
+            window_minutes=max(self.fast_pump_timeframe, self.elite_pump_timeframe),
+            min_increase_pct=min(self.fast_pump_pct, self.elite_pump_pct) * 0.5
+        )
+        self._stop_event = asyncio.Event()  # 🛑 Сигнал остановки (SIGINT/SIGTERM)
+        
+        
+        # 🔮 Парсер анонсов Binance (один на всё время работы - свой пул соединений)
+        self.announcement_parser = AnnouncementParser() if AnnouncementParser else None
         
         # Детектор новых листингов
         self.listing_detector = ListingDetector(on_new_listing=self._on_new_listing)
@@ -133,16 +343,27 @@ class RestPumpDetector:
         logger.info("🔄 REST Detector + Listing + Signal Tracker + ML инициализирован")
     
     async def start_session(self):
-        """Инициализировать persistent HTTP сессию"""
+        """
+        Инициализировать persistent HTTP сессию.
+        Один пул соединений на всё приложение: keep-alive + DNS кеш,
+        размер пула рассчитан на параллельные gather-бёрсты сигналов.
+        """
         if not self.session:
-            self.session = aiohttp.ClientSession(connector=self.connector)
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=30,
+                ttl_dns_cache=300,
+                keepalive_timeout=60
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=5, connect=2)
+            )
             logger.info("🌐 HTTP сессия создана")
     
     async def _on_new_listing(self, symbol: str, contract_data: dict):
         """Callback при обнаружении нового листинга"""
         try:
-            from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-            
             base_coin = contract_data.get('baseCoin', symbol.replace('_USDT', ''))
             max_lev = contract_data.get('maxLeverage', 0)
             
@@ -157,9 +378,7 @@ class RestPumpDetector:
 """
             
             mexc_url = f"https://futures.mexc.com/exchange/{symbol}?type=linear_swap"
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("📈 Открыть на MEXC", url=mexc_url)]
-            ])
+            keyboard = _link_keyboard(("📈 Открыть на MEXC", mexc_url))
             
             await self.app.bot.send_message(
                 chat_id=self.chat_id,
@@ -199,86 +418,133 @@ class RestPumpDetector:
             await self.session.close()
             self.session = None
             logger.info("🔌 HTTP сессия закрыта")
+        
+        if self.announcement_parser and hasattr(self.announcement_parser, 'close'):
+            await self.announcement_parser.close()
+        
+        await self.signal_generator.dex_analyzer.close()
+        if self.signal_generator.funding_analyzer:
+            await self.signal_generator.funding_analyzer.close()
     
     async def get_all_symbols(self) -> List[str]:
-        """Получить все фьючерсные пары"""
+        """Получить все фьючерсные пары (список контрактов меняется редко - кешируем)"""
+        cached_at, cached = self._symbols_cache
+        if cached is not None and time.monotonic() - cached_at < self.symbols_cache_ttl:
+            return cached
         try:
-            url = f"{self.rest_url}/api/v1/contract/detail"
+            url = self._url_detail
             async with self.session.get(url) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    data = orjson.loads(await response.read())
                     if data.get("success"):
                         symbols = [item["symbol"] for item in data.get("data", [])]
+                        self._symbols_cache = (time.monotonic(), symbols)
                         return symbols
         except Exception as e:
             logger.error(f"Ошибка получения списка пар: {e}")
         return []
     
-    async def get_ticker_batch(self, session: aiohttp.ClientSession) -> Dict:
-        """Получить все тикеры одним запросом"""
+    async def get_ticker_batch(self, session: aiohttp.ClientSession) -> Tuple[List[str], np.ndarray, np.ndarray, int]:
+        """
+        Получить все тикеры одним запросом.
+        Параллельные массивы вместо dict на каждый тикер: (symbols, prices, volumes, timestamp_ms)
+        """
         try:
-            url = f"{self.rest_url}/api/v1/contract/ticker"
+            url = self._url_ticker
             async with session.get(url) as response:
                 if response.status == 200:
-                    data = await response.json()
+                    data = orjson.loads(await response.read())
                     if data.get("success"):
-                        tickers = {}
+                        symbols = []
+                        prices = array('d')
+                        volumes = array('d')
+                        changes = {}
+                        now_ms = int(time.time() * 1000)  # Один timestamp на весь ответ
                         for ticker in data.get("data", []):
                             symbol = ticker.get("symbol")
                             if symbol:
-                                tickers[symbol] = {
-                                    "last": float(ticker.get("lastPrice", 0)),
-                                    "volume": float(ticker.get("volume24", 0)),
-                                    "timestamp": int(datetime.now().timestamp() * 1000)
-                                }
-                        return tickers
+                                symbols.append(symbol)
+                                prices.append(float(ticker.get("lastPrice", 0)))
+                                volumes.append(float(ticker.get("volume24", 0)))
+                                changes[symbol] = float(ticker.get("riseFallRate", 0))  # доля за 24ч
+                        # Общий кеш 24h-изменений: BTC и др. читаются отсюда без отдельных запросов
+                        self._ticker_cache = changes
+                        self._ticker_cache_at = time.monotonic()
+                        return (symbols, np.frombuffer(prices, dtype=np.float64),
+                                np.frombuffer(volumes, dtype=np.float64), now_ms)
         except Exception as e:
             logger.error(f"Ошибка получения тикеров: {e}")
-        return {}
+        return [], np.empty(0), np.empty(0), 0
     
-    def detect_pump(self, symbol: str) -> bool:
+    @staticmethod
+    def _scan_windows(snapshots, cutoffs: Tuple[int, ...]) -> List[Optional[List]]:
+        """
+        Один проход по снимкам (от новых к старым) сразу для нескольких окон.
+        Для каждого cutoff_ms: [count, first_ts, first_price, peak_ts, peak_price] или None.
+        Пик - самый ранний снимок с максимальной ценой (как max() по окну).
+        """
+        stats = [None] * len(cutoffs)
+        oldest_cutoff = min(cutoffs)
+        for ts, price, _ in reversed(snapshots):
+            if ts < oldest_cutoff:
+                break
+            for i, cutoff_ms in enumerate(cutoffs):
+                if ts < cutoff_ms:
+                    continue
+                w = stats[i]
+                if w is None:
+                    stats[i] = [1, ts, price, ts, price]
+                    continue
+                w[0] += 1
+                w[1] = ts
+                w[2] = price
+                if price >= w[4]:
+                    w[3] = ts
+                    w[4] = price
+        return stats
+    
+    def detect_pump(self, symbol: str) -> Tuple:
         """
         🚀 ULTRA PUMP DETECTOR v2.0
         Обнаруживает пампы двух уровней:
         - FAST: 10%+ за ≤5 минут (ювелирные быстрые пампы)
         - ELITE: 20%+ за ≤20 минут (сильные пампы)
+        
+        Возвращает (is_pump, increase_pct, time_minutes, pump_type, price_start, price_peak)
         """
         if symbol not in self.price_snapshots:
-            return False, 0, 0, ""
+            return False, 0, 0, "", 0, 0
         
         snapshots = self.price_snapshots[symbol]
         snapshot_count = len(snapshots)
         
         if snapshot_count < 2:
-            return False, 0, 0, ""
+            return False, 0, 0, "", 0, 0
         
-        now = datetime.now()
+        # Сравниваем сырые ms-таймстемпы снимков - без datetime на каждый снимок
+        now_ms = int(time.time() * 1000)
         current_price = snapshots[-1][1]
         
-        # 🔥 ПРОВЕРЯЕМ ОБА ОКНА ВРЕМЕНИ
+        # 🔥 ПРОВЕРЯЕМ ОБА ОКНА ВРЕМЕНИ (один проход по снимкам)
         is_pump = False
         pump_type = ""
         best_increase = 0
         best_time = 0
+        cutoff_fast_ms = now_ms - int(self.fast_pump_timeframe * 60_000)
+        cutoff_elite_ms = now_ms - int(self.elite_pump_timeframe * 60_000)
+        fast, elite = self._scan_windows(snapshots, (cutoff_fast_ms, cutoff_elite_ms))
         
         # === ПРОВЕРКА 1: FAST PUMP (10%+ за ≤5 мин) ===
-        cutoff_fast = now - timedelta(minutes=self.fast_pump_timeframe)
-        recent_fast = [s for s in snapshots if datetime.fromtimestamp(s[0]/1000) >= cutoff_fast]
-        
-        if len(recent_fast) >= 2:
+        if fast is not None and fast[0] >= 2:
             # 🔥 ПРАВИЛЬНАЯ ЛОГИКА: рост от НАЧАЛА окна к ПИКУ
             # Начало окна = самый старый снимок
             # Пик = максимальная цена в окне
-            price_start_fast = recent_fast[0][1]  # Самый старый снимок (начало окна)
-            
-            # Находим пик и его время
-            max_snap_fast = max(recent_fast, key=lambda x: x[1])
-            price_peak_fast = max_snap_fast[1]
+            _, start_ts_fast, price_start_fast, peak_ts_fast, price_peak_fast = fast
             
             if price_start_fast > 0:
                 increase_fast = ((price_peak_fast - price_start_fast) / price_start_fast) * 100
                 # Время от начала окна до пика
-                time_fast = (max_snap_fast[0] - recent_fast[0][0]) / 1000 / 60
+                time_fast = (peak_ts_fast - start_ts_fast) / 1000 / 60
                 
                 if time_fast <= 0:
                     time_fast = 0.1
@@ -294,21 +560,14 @@ class RestPumpDetector:
                     logger.debug(f"🔍 {symbol}: FAST близко +{increase_fast:.1f}% за {time_fast:.1f}мин (порог {self.fast_pump_pct}%)")
         
         # === ПРОВЕРКА 2: ELITE PUMP (20%+ за ≤20 мин) ===
-        cutoff_elite = now - timedelta(minutes=self.elite_pump_timeframe)
-        recent_elite = [s for s in snapshots if datetime.fromtimestamp(s[0]/1000) >= cutoff_elite]
-        
-        if len(recent_elite) >= 2:
+        if elite is not None and elite[0] >= 2:
             # 🔥 ПРАВИЛЬНАЯ ЛОГИКА: рост от НАЧАЛА окна к ПИКУ
-            price_start_elite = recent_elite[0][1]  # Самый старый снимок (начало окна)
-            
-            # Находим пик и его время
-            max_snap_elite = max(recent_elite, key=lambda x: x[1])
-            price_peak_elite = max_snap_elite[1]
+            _, start_ts_elite, price_start_elite, peak_ts_elite, price_peak_elite = elite
             
             if price_start_elite > 0:
                 increase_elite = ((price_peak_elite - price_start_elite) / price_start_elite) * 100
                 # Время от начала окна до пика
-                time_elite = (max_snap_elite[0] - recent_elite[0][0]) / 1000 / 60
+                time_elite = (peak_ts_elite - start_ts_elite) / 1000 / 60
                 
                 if time_elite <= 0:
                     time_elite = 0.1
@@ -327,59 +586,62 @@ class RestPumpDetector:
         # 🔥 УМНАЯ ФИЛЬТРАЦИЯ УСТАРЕВШИХ ПАМПОВ
         if is_pump:
             # Находим время с момента пика
-            recent = recent_elite if pump_type == "ELITE" else recent_fast
-            peak_snap = max(recent, key=lambda x: x[1])
-            peak_time = datetime.fromtimestamp(peak_snap[0]/1000)
-            time_since_peak = (now - peak_time).total_seconds() / 60
-            peak_price = peak_snap[1]
+            _, _, price_start, peak_ts, peak_price = elite if pump_type == "ELITE" else fast
+            time_since_peak = (now_ms - peak_ts) / 60_000
             
             drop_from_peak = ((peak_price - current_price) / peak_price) * 100
             
             # Пропускаем ТОЛЬКО если: пик был > 3 мин назад И цена НЕ упала (всё ещё на хаях)
             # Если цена уже начала падать — это отличный момент для входа!
             if time_since_peak > 3.0 and drop_from_peak < 1.5:
-                return False, 0, 0, ""
+                return False, 0, 0, "", 0, 0
             
             emoji = "🚀" if pump_type == "FAST" else "⚡"
             logger.warning(f"{emoji} {pump_type} PUMP: {symbol} +{best_increase:.1f}% за {best_time:.1f}мин")
-            return True, best_increase, best_time, pump_type
+            return True, best_increase, best_time, pump_type, price_start, peak_price
         
-        return False, 0, 0, ""
+        return False, 0, 0, "", 0, 0
     
-    async def scan_market(self):
-        """Сканирование рынка"""
+    async def scan_market(self) -> bool:
+        """Сканирование рынка. False - тикеры не получены (для backoff в run)"""
         self.scan_count += 1
         
         logger.debug(f"🔍 Сканирование #{self.scan_count}...")
         
-        tickers = await self.get_ticker_batch(self.session)
+        symbols, prices, volumes, timestamp = await self.get_ticker_batch(self.session)
         
-        if not tickers:
+        if not symbols:
             logger.warning("⚠️ Не удалось получить тикеры")
-            return
+            return False
         
-        logger.debug(f"✅ Получено {len(tickers)} тикеров")
+        logger.debug(f"✅ Получено {len(symbols)} тикеров")
+        
+        # Объём в USD и кандидаты в пампы - векторно на весь скан
+        volumes_usd = prices * volumes
+        candidates = self.pump_prefilter.update(symbols, prices, timestamp)
         
         pumps_found = 0
-        for symbol, ticker_data in tickers.items():
-            price = ticker_data["last"]
-            volume = ticker_data["volume"]
-            timestamp = ticker_data["timestamp"]
+        for symbol, price, volume, volume_usd, candidate in zip(
+                symbols, prices.tolist(), volumes.tolist(), volumes_usd.tolist(), candidates.tolist()):
             
             # 🚀 АДАПТИВНОЕ ХРАНЕНИЕ СНИМКОВ v2.0
             # При быстром росте сохраняем КАЖДЫЙ снимок для точности
             # При стабильности - редкие снимки (экономия памяти)
-            if not self.price_snapshots[symbol]:
+            snaps = self.price_snapshots.get(symbol)
+            if snaps is None:
+                # Новый листинг - буфера ещё нет
+                snaps = self.price_snapshots[symbol] = self._new_snapshot_buffer()
+            if not snaps:
                 # Первый снимок - всегда сохраняем
-                self.price_snapshots[symbol].append((timestamp, price, volume))
-            elif len(self.price_snapshots[symbol]) == 1:
+                snaps.append((timestamp, price, volume))
+            elif len(snaps) == 1:
                 # Второй снимок - через 1 сек минимум
-                if (timestamp - self.price_snapshots[symbol][0][0]) > 1000:
-                    self.price_snapshots[symbol].append((timestamp, price, volume))
+                if (timestamp - snaps[0][0]) > 1000:
+                    snaps.append((timestamp, price, volume))
             else:
                 # 🔥 УМНАЯ ЛОГИКА: проверяем скорость роста
-                last_price = self.price_snapshots[symbol][-1][1]
-                prev_price = self.price_snapshots[symbol][-2][1] if len(self.price_snapshots[symbol]) >= 2 else last_price
+                last_price = snaps[-1][1]
+                prev_price = snaps[-2][1] if len(snaps) >= 2 else last_price
                 
                 # Скорость роста за последний интервал
                 if prev_price > 0:
@@ -388,39 +650,40 @@ class RestPumpDetector:
                     price_change_pct = 0
                 
                 # Время с последней зафиксированной точки
-                prev_historical_time = self.price_snapshots[symbol][-2][0]
+                prev_historical_time = snaps[-2][0]
                 time_since_last = timestamp - prev_historical_time
                 
                 # 🚀 БЫСТРЫЙ РОСТ: Сохраняем КАЖДЫЙ снимок (каждые 0.05-1 сек)
                 if price_change_pct >= 0.5:  # Рост >= 0.5% за интервал
                     # Всегда добавляем новую точку при быстром движении
-                    self.price_snapshots[symbol].append((timestamp, price, volume))
+                    snaps.append((timestamp, price, volume))
                     
                 # ⚡ СРЕДНИЙ РОСТ: Сохраняем каждые 2 секунды
                 elif price_change_pct >= 0.2 and time_since_last > 2000:
-                    self.price_snapshots[symbol].append((timestamp, price, volume))
+                    snaps.append((timestamp, price, volume))
                     
                 # 📊 СТАБИЛЬНОСТЬ: Сохраняем каждые 5 секунд (как было)
                 elif time_since_last > 5000:
-                    self.price_snapshots[symbol].append((timestamp, price, volume))
+                    snaps.append((timestamp, price, volume))
                     
                 # 🔄 ОБНОВЛЯЕМ ТЕКУЩУЮ ТОЧКУ (Drifting Head)
                 else:
-                    self.price_snapshots[symbol][-1] = (timestamp, price, volume)
+                    snaps[-1] = (timestamp, price, volume)
             
-            # Очистка старых снимков (окно 40 минут для обоих типов пампов)
-            cutoff_time = timestamp - (40 * 60 * 1000)
-            self.price_snapshots[symbol] = [
-                s for s in self.price_snapshots[symbol]
-                if s[0] > cutoff_time
-            ]
+            # Очистка старых снимков с головы буфера (окно 40 минут)
+            cutoff_time = timestamp - self.snapshot_window_ms
+            while snaps and snaps[0][0] <= cutoff_time:
+                snaps.popleft()
+            
+            if not candidate:
+                continue
             
             pump_result = self.detect_pump(symbol)
             if pump_result[0]:
                 now = datetime.now()
                 
                 should_notify = True
-                current_peak = max(s[1] for s in self.price_snapshots[symbol][-50:])
+                current_peak = max(s[1] for s in islice(reversed(snaps), 50))
                 
                 # Проверяем: было ли уже уведомление о пампе этой монеты?
                 pump_type = pump_result[3]
@@ -453,14 +716,13 @@ class RestPumpDetector:
                 # 🚀 FAST PUMPS: БЕЗ COOLDOWN - мгновенные уведомления!
                 # ELITE PUMPS: тоже без cooldown (cooldown_minutes = 0)
                 if symbol in self.pump_cooldown and should_notify:
-                    time_since_last = (now - self.pump_cooldown[symbol]).total_seconds() / 60
-                    if time_since_last < self.cooldown_minutes:
+                    if time.monotonic() - self.pump_cooldown[symbol] < self.cooldown_seconds:
                         should_notify = False
 
                 pumps_found += 1
                 if should_notify:
                     self.pump_count += 1
-                    self.pump_cooldown[symbol] = now
+                    self.pump_cooldown[symbol] = time.monotonic()
                     self.last_notified_peak[symbol] = current_peak  # Запоминаем пик
                     self.last_notified_type[symbol] = pump_result[3] # Запоминаем тип пампа (Tier)
                 
@@ -468,35 +730,29 @@ class RestPumpDetector:
                 time_minutes = pump_result[2]
                 pump_type = pump_result[3]
                 
-                snapshots = self.price_snapshots[symbol]
-                
-                # 🚀 ИСПОЛЬЗУЕМ ПРАВИЛЬНОЕ ОКНО в зависимости от типа пампа
-                if pump_type == "FAST":
-                    cutoff = now - timedelta(minutes=self.fast_pump_timeframe)
-                else:
-                    cutoff = now - timedelta(minutes=self.elite_pump_timeframe)
-                    
-                recent = [s for s in snapshots if datetime.fromtimestamp(s[0]/1000) >= cutoff]
-                
-                if len(recent) < 2:
-                    continue
+                # Начало окна и пик уже посчитаны в detect_pump - повторно снимки не сканируем
+                price_start, price_peak = pump_result[4], pump_result[5]
                 
                 pump_data = {
                     "symbol": symbol,
-                    "price_start": recent[0][1],
-                    "price_peak": max(s[1] for s in recent),
+                    "price_start": price_start,
+                    "price_peak": price_peak,
                     "current_price": price,
                     "increase_pct": increase_pct,
                     "actual_time_minutes": time_minutes,
                     "pump_type": pump_type,
                     "volume_spike": 1.5,
-                    "volume_usd": volume * price,
+                    "volume_usd": volume_usd,
                     "detected_at": datetime.now(),
                     "timeframe_minutes": self.fast_pump_timeframe if pump_type == "FAST" else self.elite_pump_timeframe
                 }
                 
                 if should_notify:
-                    await self.send_pump_alert(pump_data)
+                    # Отправка в фоне: RetryAfter/backoff/лимитер не держат цикл сканирования
+                    try:
+                        self._alert_queue.put_nowait(pump_data)
+                    except asyncio.QueueFull:
+                        logger.warning(f"📭 {symbol}: очередь алертов переполнена, алерт пропущен")
                 
                 # Запускаем анализ В ФОНЕ (только если еще не анализируем ИЛИ новый пик)
                 already_analyzing = symbol in self.active_analyses
@@ -506,17 +762,18 @@ class RestPumpDetector:
                     if new_higher_high:
                         logger.info(f"🆕 {symbol}: Новый хай! Рестартую анализ.")
                     self.active_analyses.add(symbol)
-                    asyncio.create_task(self._analyze_with_notification(symbol, pump_data, now))
+                    self.depth_stream.watch(symbol)
+                    self._spawn(self._analyze_with_notification(symbol, pump_data, now))
                 else:
                     logger.debug(f"🔄 {symbol}: Анализ уже идёт, пропускаем")
         
         # 📊 ОТЧЕТ: Топ-3 пары по росту (для диагностики)
         if self.scan_count % 20 == 0:  # Каждые 20 сканов (примерно раз в минуту при 0.05 сек интервале)
             top_movers = []
+            cutoff_ms = int(time.time() * 1000) - 5 * 60_000
             for sym, snaps in self.price_snapshots.items():
                 if len(snaps) >= 2:
-                    cutoff_time = datetime.now() - timedelta(minutes=5)
-                    recent = [s for s in snaps if datetime.fromtimestamp(s[0]/1000) >= cutoff_time]
+                    recent = [s for s in snaps if s[0] >= cutoff_ms]
                     if len(recent) >= 2:
                         min_price = min(s[1] for s in recent)
                         max_price = max(s[1] for s in recent)
@@ -530,6 +787,7 @@ class RestPumpDetector:
                 logger.info(f"📈 Топ-3 роста за 5мин: " + " | ".join([f"{s} +{g:.1f}% ({n} снимков)" for s, g, n in top_3]))
         
         logger.info(f"📊 Скан #{self.scan_count}: {pumps_found} пампов | Всего: {self.pump_count} пампов, {self.signal_count} сигналов")
+        return True
     
     async def _analyze_with_notification(self, symbol: str, pump_data: Dict, detected_time: datetime):
         """
@@ -618,17 +876,18 @@ class RestPumpDetector:
 
                 # 🔒 ПРОВЕРКА COOLDOWN: Если уже отправили сигнал - выходим
                 if symbol in self.signal_cooldown:
-                    time_since_signal = (datetime.now() - self.signal_cooldown[symbol]).total_seconds() / 60
-                    if time_since_signal < 20:  # Cooldown 20 минут
-                        logger.debug(f"🔇 {symbol}: Сигнал уже отправлен {time_since_signal:.1f} мин назад, пропускаю")
+                    time_since_signal = time.monotonic() - self.signal_cooldown[symbol]
+                    if time_since_signal < self.signal_cooldown_seconds:
+                        logger.debug(f"🔇 {symbol}: Сигнал уже отправлен {time_since_signal / 60:.1f} мин назад, пропускаю")
                         return
 
-                # 2. Пробуем найти сигнал
-                signal = await self.analyze_and_generate_signal(symbol, pump_data)
+                # 2. Пробуем найти сигнал (REST-запросы всех мониторингов ограничены семафором)
+                async with self._analysis_sem:
+                    signal = await self.analyze_and_generate_signal(symbol, pump_data)
                 
                 if signal:
                     logger.info(f"✅ {symbol}: ТВХ найдена! Завершаю мониторинг.")
-                    self.signal_cooldown[symbol] = datetime.now()
+                    self.signal_cooldown[symbol] = time.monotonic()
                     return
                 
                 # 3. Проверяем, не упала ли монета (Pump Dumped)
@@ -648,6 +907,7 @@ class RestPumpDetector:
             logger.error(f"❌ {symbol}: Ошибка мониторинга: {e}")
         finally:
             self.active_analyses.discard(symbol)
+            self.depth_stream.unwatch(symbol)
     
     async def send_no_signal_notification(self, symbol: str, pump_data: Dict, reason: str = "Не прошли фильтры"):
         """Уведомление что ТВХ не найдена и мониторинг завершён (макс 1 раз в 30 мин на символ)"""
@@ -655,9 +915,9 @@ class RestPumpDetector:
         
         try:
             # Проверяем cooldown чтобы не спамить
-            now = datetime.now()
+            now = time.monotonic()
             if symbol in self.no_signal_cooldown:
-                time_since_last = (now - self.no_signal_cooldown[symbol]).total_seconds() / 60
+                time_since_last = (now - self.no_signal_cooldown[symbol]) / 60
                 if time_since_last < 30:  # Молчим 30 минут после последнего уведомления
                     logger.debug(f"🔇 {symbol}: Пропуск уведомления (cooldown {30 - time_since_last:.1f} мин)")
                     return
@@ -677,17 +937,235 @@ class RestPumpDetector:
         except Exception as e:
             logger.error(f"Ошибка отправки no-signal: {e}")
     
+    # ═══════════════════════════════════════════════════════════════
+    # 🌐 REST FETCHERS (для параллельного запуска через asyncio.gather)
+    # Каждый никогда не бросает исключение - при ошибке возвращает дефолт
+    # ═══════════════════════════════════════════════════════════════
+    
+    def _new_snapshot_buffer(self) -> deque:
+        """Кольцевой буфер снимков монеты: maxlen = максимум снимков за окно (не больше одного на скан)"""
+        return deque(maxlen=math.ceil(self.snapshot_window_ms / 1000 / self.scan_interval))
+    
+    def _last_snapshots(self, symbol: str, n: int) -> List[Tuple]:
+        """Последние n снимков монеты (deque не поддерживает срезы)"""
+        snaps = self.price_snapshots.get(symbol)
+        if not snaps:
+            return []
+        tail = list(islice(reversed(snaps), n))
+        tail.reverse()
+        return tail
+    
+    def _history_arrays(self, symbol: str, n: int = 100) -> Tuple[np.ndarray, np.ndarray]:
+        """Цены и объёмы последних n снимков - столбцы одного float64 массива, без списков на каждый сигнал"""
+        snaps = self._last_snapshots(symbol, n)
+        if not snaps:
+            return np.empty(0), np.empty(0)
+        arr = np.asarray(snaps, dtype=np.float64)
+        return arr[:, 1], arr[:, 2]
+    
+    def _minute_bars(self, symbol: str, limit: int = 100) -> List[Dict]:
+        """
+        Минутные свечи из последних limit снапшотов, инкрементально: закрытые минуты
+        кешируются, пересчитываются только первая (обрезанная окном) и текущая минуты.
+        Результат тот же, что _snapshots_to_klines(_last_snapshots(symbol, limit)).
+        """
+        window = self._last_snapshots(symbol, limit)
+        if not window:
+            return []
+        first_minute = int(window[0][0]) // 60000 * 60000
+        closed_until, closed = self._bars_cache.get(symbol, (0, []))
+        
+        # Из кеша - только минуты целиком внутри окна: старые (прошлые пампы) выбрасываем,
+        # первую минуту окна (снапшоты до окна в неё не входят) считаем заново
+        closed = [bar for bar in closed if bar["timestamp"] > first_minute]
+        if closed:
+            head_end = closed[0]["timestamp"]
+            head = self._snapshots_to_klines([s for s in window if s[0] < head_end]) if window[0][0] < head_end else []
+            tail = self._snapshots_to_klines([s for s in window if s[0] >= closed_until])
+        else:
+            head = []
+            tail = self._snapshots_to_klines(window)
+        
+        if len(tail) > 1:
+            # Все минуты кроме последней закрыты - их снапшоты больше не меняются
+            closed = closed + tail[:-1]
+            self._bars_cache[symbol] = (tail[-1]["timestamp"], closed)
+            tail = tail[-1:]
+        elif symbol in self._bars_cache:
+            self._bars_cache[symbol] = (closed_until, closed)
+        return head + closed + tail
+    
+    @staticmethod
+    def _snapshots_to_klines(snapshots: List[Tuple]) -> List[Dict]:
+        """
+        Минутные OHLCV из снапшотов (timestamp_ms, price, volume) одним проходом NumPy.
+        После сортировки по времени минуты - непрерывные отрезки массива.
+        """
+        snaps = np.asarray(snapshots, dtype=np.float64)
+        minute = (snaps[:, 0] // 60000).astype(np.int64) * 60000
+        if np.any(minute[1:] < minute[:-1]):
+            # Стабильная сортировка сохраняет порядок внутри минуты (open/close)
+            order = np.argsort(minute, kind='stable')
+            snaps = snaps[order]
+            minute = minute[order]
+        keys, starts, counts = np.unique(minute, return_index=True, return_counts=True)
+        ends = starts + counts - 1
+        
+        prices = snaps[:, 1]
+        highs = np.maximum.reduceat(prices, starts)
+        lows = np.minimum.reduceat(prices, starts)
+        volumes = np.add.reduceat(snaps[:, 2], starts) / counts
+        
+        return [
+            {
+                "timestamp": int(keys[i]),
+                "open": float(prices[starts[i]]),
+                "high": float(highs[i]),
+                "low": float(lows[i]),
+                "close": float(prices[ends[i]]),
+                "volume": float(volumes[i])
+            }
+            for i in range(len(keys))
+        ]
+    
+    @staticmethod
+    def _pct_diffs(entry: float, sl: float, tps: List[float]) -> np.ndarray:
+        """% отклонения [SL, TP1, TP2, TP3] от цены входа одним векторным вызовом"""
+        return pct_diffs(np.array([sl, *tps[:3]], dtype=np.float64), entry)
+    
+    @staticmethod
+    def _btc_score_from_change(btc_change: float) -> Tuple[float, str]:
+        """BTC за 24ч (%) → (btc_score, btc_emoji) для шорта"""
+        if btc_change <= -3:
+            return 9.0, "📉"  # BTC dumping hard = GREAT for short
+        elif btc_change <= -1:
+            return 7.0, "📉"  # BTC falling = good for short
+        elif btc_change >= 3:
+            return 2.0, "📈"  # BTC pumping = risky for short
+        elif btc_change >= 1:
+            return 4.0, "📈"  # BTC rising = less ideal
+        return 5.0, "➡️"
+    
+    async def _fetch_btc(self) -> Tuple[float, str]:
+        """🔥 BTC CORRELATION: (btc_score, btc_emoji), кешируется на btc_cache_ttl"""
+        # Скан рынка уже тянет все тикеры - BTC берём оттуда
+        btc_change = self._ticker_cache.get("BTC_USDT")
+        if btc_change is not None and time.monotonic() - self._ticker_cache_at < self.btc_cache_ttl:
+            return self._btc_score_from_change(btc_change * 100)
+        
+        cached_at, cached = self._btc_cache
+        if cached and time.monotonic() - cached_at < self.btc_cache_ttl:
+            return cached
+        
+        btc_score = 5.0
+        btc_emoji = "➡️"
+        try:
+            async with self.session.get(self._url_btc_ticker, timeout=self.request_timeout) as resp:
+                if resp.status == 200:
+                    btc_data = orjson.loads(await resp.read())
+                    if btc_data.get('success'):
+                        ticker = btc_data.get('data', {})
+                        btc_change = float(ticker.get('riseFallRate', 0)) * 100  # % change 24h
+                        btc_score, btc_emoji = self._btc_score_from_change(btc_change)
+                        self._btc_cache = (time.monotonic(), (btc_score, btc_emoji))
+        except Exception as btc_err:
+            logger.debug(f"BTC check error: {btc_err}")
+        return btc_score, btc_emoji
+    
+    async def _fetch_orderbook(self, symbol: str, limit: int = 50) -> Optional[Dict]:
+        """Стакан: сырой data-блок MEXC ({'asks': [...], 'bids': [...], ...}) или None"""
+        try:
+            ob_url = self._url_depth_tmpl.format(symbol)
+            async with self.session.get(ob_url, params={"limit": limit}, timeout=self.request_timeout) as resp:
+                if resp.status == 200:
+                    data = orjson.loads(await resp.read())
+                    if data.get('success'):
+                        return data.get('data')
+        except Exception as ob_err:
+            logger.debug(f"Ошибка получения стакана {symbol}: {ob_err}")
+        return None
+    
+    async def _get_orderbook(self, symbol: str, limit: int = 50) -> Optional[Dict]:
+        """Стакан из WS-потока (0 RTT), если синхронизирован - иначе REST"""
+        book = self.depth_stream.get_book(symbol, limit)
+        if book is not None:
+            return book
+        return await self._fetch_orderbook(symbol, limit)
+    
+    async def _fetch_klines(self, symbol: str, limit: int = 30) -> List[MexcKline]:
+        """Минутные свечи MEXC (уже типизированные msgspec) или []"""
+        cached = self._klines_cache.get(symbol)
+        if cached and cached[1] >= limit and time.monotonic() - cached[0] < self.klines_cache_ttl:
+            return cached[2][-limit:]
+        
+        try:
+            klines_url = self._url_kline_tmpl.format(symbol)
+            async with self.session.get(klines_url, params={"interval": "Min1", "limit": limit}, timeout=self.request_timeout) as resp:
+                if resp.status == 200:
+                    body = await resp.read()
+                    try:
+                        data = _KLINES_DECODER.decode(body)
+                        klines = data.data if data.success else None
+                    except msgspec.ValidationError as ke:
+                        # Одна битая строка не должна обнулять все свечи
+                        logger.debug(f"Свечи {symbol} с битыми строками, разбор по строкам: {ke}")
+                        klines = _parse_klines_rows(body)
+                    if klines is not None:
+                        self._klines_cache[symbol] = (time.monotonic(), limit, klines)
+                        return klines
+        except Exception as ke:
+            logger.debug(f"Не удалось получить свечи {symbol}: {ke}")
+        return []
+    
+    async def _fetch_funding(self, symbol: str) -> Tuple[float, str]:
+        """🔥 FUNDING RATE: (funding_score, funding_emoji), кешируется на funding_cache_ttl"""
+        cached = self._funding_cache.get(symbol)
+        if cached and time.monotonic() - cached[0] < self.funding_cache_ttl:
+            return cached[1]
+        
+        funding_score = 5.0
+        funding_emoji = "➡️"
+        try:
+            async with self.session.get(self._url_funding_tmpl.format(symbol), timeout=self.request_timeout) as resp:
+                if resp.status == 200:
+                    f_data = orjson.loads(await resp.read())
+                    if f_data.get('success'):
+                        fr = float(f_data.get('data', {}).get('fundingRate', 0))
+                        fr_pct = fr * 100
+                        if fr_pct >= 0.10:
+                            funding_score = 9.0
+                            funding_emoji = "🔥"
+                        elif fr_pct >= 0.05:
+                            funding_score = 7.0
+                            funding_emoji = "✅"
+                        elif fr_pct > 0:
+                            funding_score = 5.0
+                            funding_emoji = "➡️"
+                        else:
+                            funding_score = 2.0
+                            funding_emoji = "⚠️"
+                        self._funding_cache[symbol] = (time.monotonic(), (funding_score, funding_emoji))
+        except Exception as fr_err:
+            logger.debug(f"Funding rate error: {fr_err}")
+        return funding_score, funding_emoji
+    
     async def send_instant_short_signal(self, symbol: str, pump_data: Dict, entry_price: float):
         """
         🔥 INSTANT SHORT - мгновенный сигнал для экстремальных пампов
         Отправляется сразу на пике без ожидания
         """
         try:
-            from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-            
             increase_pct = pump_data.get('increase_pct', 0)
             peak_price = pump_data.get('price_peak', entry_price)
             
+            # ⚡ РАННЯЯ ОТСЕЧКА: без ML итоговый score = GOD BRAIN, а его максимум
+            # известен по истории монеты ещё до сетевых запросов
+            if not self.ml_predictor.is_trained:
+                max_score = self.god_brain.get_max_final_score(symbol, increase_pct)
+                if max_score < 5.0:
+                    logger.info(f"🚫 {symbol}: D-TIER заранее (макс {max_score:.1f}/10) — анализ пропущен")
+                    return
+            
             self.signal_count += 1
             logger.warning(f"⚡🎯 INSTANT SHORT #{self.signal_count}: {symbol} @ {entry_price:.8f}")
             
@@ -696,73 +1174,46 @@ class RestPumpDetector:
             start_price = pump_data.get('price_start', entry_price * 0.8)
             actual_time = pump_data.get('actual_time_minutes', 5.0)
             
+            # 🚀 ВСЕ СЕТЕВЫЕ ЗАПРОСЫ ПАРАЛЛЕЛЬНО: время = max(RTT), а не сумма
+            # Анализаторы ограничены по времени: таймаут = исключение = дефолтный score
+            analyzer_timeout = self.request_timeout.total
+            (btc_res, ob_res, kl_res, fr_res,
+             oi_res, mtf_res, vol_res, cross_res) = await asyncio.gather(
+                self._fetch_btc(),
+                self._get_orderbook(symbol, limit=50),
+                self._fetch_klines(symbol, limit=30),
+                self._fetch_funding(symbol),
+                asyncio.wait_for(self.oi_analyzer.analyze(symbol, self.session), analyzer_timeout),
+                asyncio.wait_for(self.mtf_analyzer.analyze(symbol, self.session), analyzer_timeout),
+                asyncio.wait_for(self.volume_analyzer.analyze(symbol, entry_price, self.session), analyzer_timeout),
+                asyncio.wait_for(self.cross_pair_analyzer.analyze(symbol, self.session), analyzer_timeout),
+                return_exceptions=True
+            )
+            
             # 🔥 BTC CORRELATION CHECK
-            btc_score = 5.0
-            btc_emoji = "➡️"
-            try:
-                async with self.session.get(f"{self.rest_url}/api/v1/contract/ticker?symbol=BTC_USDT") as resp:
-                    if resp.status == 200:
-                        btc_data = await resp.json()
-                        if btc_data.get('success'):
-                            ticker = btc_data.get('data', {})
-                            btc_change = float(ticker.get('riseFallRate', 0)) * 100  # % change 24h
-                            if btc_change <= -3:
-                                btc_score = 9.0  # BTC dumping hard = GREAT for short
-                                btc_emoji = "📉"
-                            elif btc_change <= -1:
-                                btc_score = 7.0  # BTC falling = good for short
-                                btc_emoji = "📉"
-                            elif btc_change >= 3:
-                                btc_score = 2.0  # BTC pumping = risky for short
-                                btc_emoji = "📈"
-                            elif btc_change >= 1:
-                                btc_score = 4.0  # BTC rising = less ideal
-                                btc_emoji = "📈"
-            except Exception as btc_err:
-                logger.debug(f"BTC check error: {btc_err}")
-            
-            # 🔥 FETCH FRESH ORDERBOOK
+            btc_score, btc_emoji = btc_res
+            
+            # 🔥 FRESH ORDERBOOK
             orderbook = None
             ob_analysis = None
-            try:
-                ob_url = f"{self.rest_url}/api/v1/contract/depth/{symbol}"
-                async with self.session.get(ob_url, params={"limit": 50}) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        if data.get('success'):
-                            ob_data = data.get('data', {})
-                            orderbook = {
-                                "asks": ob_data.get('asks', []),
-                                "bids": ob_data.get('bids', [])
-                            }
-                            # 🔥 ULTRA ORDERBOOK ANALYSIS
-                            ob_analysis = self.ultra_ob.analyze(orderbook, entry_price)
-                            if ob_analysis.get("short_score", 5) >= 6:
-                                logger.info(f"📊 {symbol}: Ultra OB Score {ob_analysis['short_score']:.1f}/10 | {ob_analysis.get('summary', '')}")
-            except Exception as ob_err:
-                logger.debug(f"Ошибка получения стакана: {ob_err}")
-            
-            # Получаем свечи для анализа формы и ATR
-            klines = []
-            try:
-                klines_url = f"{self.rest_url}/api/v1/contract/kline/{symbol}"
-                async with self.session.get(klines_url, params={"interval": "Min1", "limit": 30}) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        if data.get('success'):
-                            raw_klines = data.get('data', [])
-                            for k in raw_klines:
-                                if isinstance(k, dict):
-                                    klines.append([
-                                        k.get('time', 0),
-                                        float(k.get('open', 0)),
-                                        float(k.get('high', 0)),
-                                        float(k.get('low', 0)),
-                                        float(k.get('close', 0)),
-                                        float(k.get('vol', 0))
-                                    ])
-            except Exception as ke:
-                logger.debug(f"Не удалось получить свечи для Smart TP: {ke}")
+            if ob_res:
+                orderbook = {
+                    "asks": ob_res.get('asks', []),
+                    "bids": ob_res.get('bids', [])
+                }
+                # 🔥 ULTRA ORDERBOOK ANALYSIS
+                ob_analysis = self.ultra_ob.analyze(orderbook, entry_price)
+                if ob_analysis.get("short_score", 5) >= 6:
+                    logger.info(f"📊 {symbol}: Ultra OB Score {ob_analysis['short_score']:.1f}/10 | {ob_analysis.get('summary', '')}")
+            
+            # Свечи для анализа формы и ATR: float64 массив (N, 6) [t, o, h, l, c, v]
+            klines = np.empty((0, 6))
+            if isinstance(kl_res, list) and kl_res:
+                # Схема уже проверена msgspec при разборе ответа
+                klines = np.fromiter(
+                    ((k.time, k.open, k.high, k.low, k.close, k.vol) for k in kl_res),
+                    dtype=np.dtype((np.float64, 6))
+                )
 
             smart_levels = self.smart_calculator.calculate(
                 symbol=symbol,
@@ -790,12 +1241,6 @@ class RestPumpDetector:
             sl = smart_levels['stop_loss']
             tps = smart_levels['take_profits']
             
-            # Формируем красивые строки
-            sl_pct_diff = ((sl - entry_price) / entry_price) * 100
-            tp1_pct_diff = ((tps[0] - entry_price) / entry_price) * 100
-            tp2_pct_diff = ((tps[1] - entry_price) / entry_price) * 100
-            tp3_pct_diff = ((tps[2] - entry_price) / entry_price) * 100
-
             # Получаем GodEye и Dominator данные из анализа
             analysis = smart_levels.get('analysis', {})
             god_eye_score = analysis.get('god_eye_score', 5.0)
@@ -807,42 +1252,18 @@ class RestPumpDetector:
             # 🔥 OPEN INTEREST ANALYSIS
             oi_score = 5.0
             oi_emoji = "➡️"
-            try:
-                oi_result = await self.oi_analyzer.analyze(symbol, self.session)
-                if oi_result.get('oi_change'):
-                    oi_score = oi_result.get('oi_score', 5.0)
-                    oi_trend = oi_result['oi_change'].get('oi_trend', 'stable')
-                    if oi_trend == 'falling':
-                        oi_emoji = "🔻"  # OI падает = хорошо
-                    elif oi_trend == 'rising':
-                        oi_emoji = "🔺"  # OI растёт = осторожно
-            except Exception as oi_err:
-                logger.debug(f"OI analysis error: {oi_err}")
+            if isinstance(oi_res, Exception):
+                logger.debug(f"OI analysis error: {oi_res}")
+            elif oi_res.get('oi_change'):
+                oi_score = oi_res.get('oi_score', 5.0)
+                oi_trend = oi_res['oi_change'].get('oi_trend', 'stable')
+                if oi_trend == 'falling':
+                    oi_emoji = "🔻"  # OI падает = хорошо
+                elif oi_trend == 'rising':
+                    oi_emoji = "🔺"  # OI растёт = осторожно
             
             # 🔥 FUNDING RATE ANALYSIS
-            funding_score = 5.0
-            funding_emoji = "➡️"
-            try:
-                async with self.session.get(f"{self.rest_url}/api/v1/contract/funding_rate/{symbol}") as resp:
-                    if resp.status == 200:
-                        f_data = await resp.json()
-                        if f_data.get('success'):
-                            fr = float(f_data.get('data', {}).get('fundingRate', 0))
-                            fr_pct = fr * 100
-                            if fr_pct >= 0.10:
-                                funding_score = 9.0
-                                funding_emoji = "🔥"
-                            elif fr_pct >= 0.05:
-                                funding_score = 7.0
-                                funding_emoji = "✅"
-                            elif fr_pct > 0:
-                                funding_score = 5.0
-                                funding_emoji = "➡️"
-                            else:
-                                funding_score = 2.0
-                                funding_emoji = "⚠️"
-            except Exception as fr_err:
-                logger.debug(f"Funding rate error: {fr_err}")
+            funding_score, funding_emoji = fr_res
             
             # 🔥 ORDERBOOK SCORE
             ob_score = ob_analysis.get('short_score', 5.0) if ob_analysis else 5.0
@@ -864,35 +1285,34 @@ class RestPumpDetector:
             
             # ⏱️ MULTI-TIMEFRAME ANALYSIS
             mtf_score = 5.0
-            try:
-                mtf_result = await self.mtf_analyzer.analyze(symbol, self.session)
-                mtf_score = mtf_result.get('short_score', 5.0)
-                if mtf_result.get('confluence') in ['STRONG_SHORT', 'AVOID_SHORT']:
-                    logger.info(f"⏱️ {symbol}: {mtf_result.get('summary', '')}")
-            except Exception as mtf_err:
-                logger.debug(f"MTF analysis error: {mtf_err}")
+            if isinstance(mtf_res, Exception):
+                logger.debug(f"MTF analysis error: {mtf_res}")
+            else:
+                mtf_score = mtf_res.get('short_score', 5.0)
+                if mtf_res.get('confluence') in ['STRONG_SHORT', 'AVOID_SHORT']:
+                    logger.info(f"⏱️ {symbol}: {mtf_res.get('summary', '')}")
             
             # 📊 VOLUME PROFILE
             vol_score = 5.0
-            try:
-                vol_result = await self.volume_analyzer.analyze(symbol, entry_price, self.session)
-                vol_score = vol_result.get('score', 5.0)
-            except Exception as vol_err:
-                logger.debug(f"Volume profile error: {vol_err}")
+            if isinstance(vol_res, Exception):
+                logger.debug(f"Volume profile error: {vol_res}")
+            else:
+                vol_score = vol_res.get('score', 5.0)
             
             # � CROSS-PAIR CORRELATION
             cross_score = 5.0
-            try:
-                cross_result = await self.cross_pair_analyzer.analyze(symbol, self.session)
-                cross_score = cross_result.get('score', 5.0)
-                if cross_result.get('correlation') in ['SECTOR_PUMP', 'SECTOR_DUMP']:
-                    logger.info(f"🔗 {symbol}: {cross_result.get('summary', '')}")
-            except Exception as cross_err:
-                logger.debug(f"Cross-pair error: {cross_err}")
+            if isinstance(cross_res, Exception):
+                logger.debug(f"Cross-pair error: {cross_res}")
+            else:
+                cross_score = cross_res.get('score', 5.0)
+                if cross_res.get('correlation') in ['SECTOR_PUMP', 'SECTOR_DUMP']:
+                    logger.info(f"🔗 {symbol}: {cross_res.get('summary', '')}")
             
             # �🔥 COMBINED QUALITY SCORE (0-10) - 10 метрик!
-            combined_score = (god_eye_score + dominator_score + oi_score + funding_score + 
-                             ob_score + btc_score + liq_score + mtf_score + vol_score + cross_score) / 10
+            combined_score = float(aggregate_scores(np.array([
+                god_eye_score, dominator_score, oi_score, funding_score, ob_score,
+                btc_score, liq_score, mtf_score, vol_score, cross_score
+            ], dtype=np.float64)))
             
             # 🧠 GOD BRAIN v2.0: SMART PREDICTION (максимальный интеллект)
             smart_pred = self.god_brain.get_smart_prediction(symbol, increase_pct, combined_score)
@@ -901,17 +1321,14 @@ class RestPumpDetector:
             # 🤖 ML PREDICTOR: Машинное обучение для вероятности WIN
             ml_prob = 0.5
             try:
-                ml_result = self.ml_predictor.predict({
-                    'pump_pct': increase_pct,
-                    'combined_score': combined_score,
-                    'god_eye_score': god_eye_score,
-                    'dominator_score': dominator_score,
-                    'orderbook_score': ob_score,
-                    'oi_score': oi_score,
-                    'funding_score': funding_score,
-                    'btc_score': btc_score,
-                    'liq_score': liq_score
-                })
+                # Вектор в порядке ML_FEATURE_ORDER (float32 - как в деревьях sklearn)
+                ml_features = np.empty((1, len(ML_FEATURE_ORDER)), dtype=np.float32)
+                ml_features[0] = (
+                    increase_pct, combined_score, god_eye_score, dominator_score,
+                    ob_score, oi_score, funding_score, btc_score, liq_score,
+                    actual_time, datetime.now().hour
+                )
+                ml_result = self.ml_predictor.predict(ml_features)
                 ml_prob = ml_result.get('probability', 0.5)
                 if ml_result.get('confidence') != 'NO_MODEL':
                     logger.info(f"🤖 {symbol}: ML WIN prob {ml_prob*100:.0f}% | {ml_result.get('recommendation', '')}")
@@ -951,10 +1368,8 @@ class RestPumpDetector:
             # 📊 Сортируем TP по возрастанию профита (для шорта: чем ниже цена - тем больше профит)
             tps = sorted(tps)  # Сортируем по возрастанию цены (TP1 самый близкий, TP3 самый далёкий)
             
-            # Пересчитываем % для отсортированных TP
-            tp1_pct_diff = ((tps[0] - entry_price) / entry_price) * 100
-            tp2_pct_diff = ((tps[1] - entry_price) / entry_price) * 100
-            tp3_pct_diff = ((tps[2] - entry_price) / entry_price) * 100
+            # % SL/TP от входа - один раз, уже по отсортированным TP
+            sl_pct_diff, tp1_pct_diff, tp2_pct_diff, tp3_pct_diff = self._pct_diffs(entry_price, sl, tps)
 
             msg = f"""
 📉 *SHORT* | {quality_label}
@@ -967,9 +1382,7 @@ class RestPumpDetector:
 """
             
             mexc_url = f"https://futures.mexc.com/exchange/{symbol}?type=linear_swap"
-            keyboard = InlineKeyboardMarkup([
-                [InlineKeyboardButton("📈 Открыть MEXC", url=mexc_url)]
-            ])
+            keyboard = _link_keyboard(("📈 Открыть MEXC", mexc_url))
             
             await self.broadcast_message(
                 text=msg,
@@ -979,24 +1392,26 @@ class RestPumpDetector:
             
             # Сохраняем в БД
             try:
-                pump_id = self.db.add_pump(
-                    symbol=symbol,
-                    price_start=pump_data.get('price_start', 0),
-                    price_peak=peak_price,
-                    price_increase_pct=increase_pct,
-                    volume_spike=pump_data.get('volume_spike', 1.5),
-                    timeframe_minutes=pump_data.get('timeframe_minutes', 20)
-                )
-                self.db.add_signal(
-                    pump_id=pump_id,
-                    symbol=symbol,
-                    entry_price=entry_price,
-                    stop_loss=None,
-                    take_profits=[],
-                    risk_reward=0,
-                    quality_score=9.0,  # Высокий score для instant
-                    factors={"instant_short": True, "pump_pct": increase_pct},
-                    weights={}
+                await asyncio.to_thread(
+                    self._persist_signal,
+                    dict(
+                        symbol=symbol,
+                        price_start=pump_data.get('price_start', 0),
+                        price_peak=peak_price,
+                        price_increase_pct=increase_pct,
+                        volume_spike=pump_data.get('volume_spike', 1.5),
+                        timeframe_minutes=pump_data.get('timeframe_minutes', 20)
+                    ),
+                    dict(
+                        symbol=symbol,
+                        entry_price=entry_price,
+                        stop_loss=None,
+                        take_profits=[],
+                        risk_reward=0,
+                        quality_score=9.0,  # Высокий score для instant
+                        factors={"instant_short": True, "pump_pct": increase_pct},
+                        weights={}
+                    )
                 )
                 
                 # Регистрируем в трекере
@@ -1030,7 +1445,7 @@ class RestPumpDetector:
                 })
                 
                 # 📈 TRAILING TP: Регистрируем позицию для trailing
-                signal_id = f"{symbol}_{datetime.now().timestamp()}"
+                signal_id = f"{symbol}_{time.time()}"
                 self.trailing_tracker.add_position(
                     signal_id=signal_id,
                     symbol=symbol,
@@ -1044,19 +1459,30 @@ class RestPumpDetector:
         except Exception as e:
             logger.error(f"Ошибка instant short: {e}")
     
+    def _spawn(self, coro) -> asyncio.Task:
+        """Фоновая задача со ссылкой в _background_tasks до завершения"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+    
+    async def _alert_sender_loop(self):
+        """Отправка алертов о пампах из очереди по одному (в темпе лимитера Telegram)"""
+        while not self._stop_event.is_set():
+            pump_data = await self._alert_queue.get()
+            await self.send_pump_alert(pump_data)
+    
     async def send_pump_alert(self, pump_data: Dict):
         """Отправить уведомление о пампе"""
         try:
             actual_time = pump_data.get('actual_time_minutes', pump_data['timeframe_minutes'])
-            msg = f"""
-◈ *Pump Detected*
-
-`{pump_data['symbol']}`
-+{pump_data['increase_pct']:.1f}% in {actual_time:.1f}m
-`{pump_data['price_start']:.8f}` ➔ `{pump_data['price_peak']:.8f}`
-
-_Analyzing..._
-"""
+            msg = _PUMP_TEMPLATE.format(
+                symbol=pump_data['symbol'],
+                increase_pct=pump_data['increase_pct'],
+                actual_time=actual_time,
+                price_start=pump_data['price_start'],
+                price_peak=pump_data['price_peak']
+            )
             await self.broadcast_message(
                 text=msg,
                 parse_mode='Markdown'
@@ -1064,84 +1490,80 @@ _Analyzing..._
         except Exception as e:
             logger.error(f"Ошибка отправки уведомления: {e}")
     
+    def _persist_signal(self, pump_fields: Dict, signal_fields: Dict) -> int:
+        """
+        Запись пампа и сигнала в SQLite (синхронно - вызывается через asyncio.to_thread,
+        чтобы commit/fsync не держал event loop и следующий скан).
+        У Database соединение на поток, так что из потока безопасно;
+        памп и сигнал пишутся одной транзакцией - один коммит на событие.
+        """
+        with self.db.transaction():
+            pump_id = self.db.add_pump(**pump_fields)
+            self.db.add_signal(pump_id=pump_id, **signal_fields)
+        return pump_id
+    
     async def analyze_and_generate_signal(self, symbol: str, pump_data: Dict):
-        """Анализ и генерация сигнала"""
+        """
+        Анализ и генерация сигнала.
+        Если анализ этой монеты уже идёт (перекрывающиеся мониторинги) -
+        ждём его результат вместо повторного круга REST-запросов.
+        """
+        fut = self._inflight.get(symbol)
+        if fut is not None:
+            logger.debug(f"🔄 {symbol}: Анализ уже выполняется, жду его результат")
+            return await asyncio.shield(fut)
+        
+        fut = asyncio.ensure_future(self._run_analysis(symbol, pump_data))
+        self._inflight[symbol] = fut
+        try:
+            return await asyncio.shield(fut)
+        finally:
+            if fut.done():
+                self._inflight.pop(symbol, None)
+            else:
+                fut.add_done_callback(lambda _: self._inflight.pop(symbol, None))
+    
+    async def _run_analysis(self, symbol: str, pump_data: Dict):
+        """Анализ и генерация сигнала (один проход)"""
         
         # 🔒 КРИТИЧЕСКАЯ ПРОВЕРКА: Если уже отправили сигнал - не генерируем новый!
         if symbol in self.signal_cooldown:
-            time_since_signal = (datetime.now() - self.signal_cooldown[symbol]).total_seconds() / 60
-            if time_since_signal < 20:  # Cooldown 20 минут
-                logger.debug(f"🔇 {symbol}: Сигнал уже отправлен {time_since_signal:.1f} мин назад, возврат None")
+            time_since_signal = time.monotonic() - self.signal_cooldown[symbol]
+            if time_since_signal < self.signal_cooldown_seconds:
+                logger.debug(f"🔇 {symbol}: Сигнал уже отправлен {time_since_signal / 60:.1f} мин назад, возврат None")
                 return None
         
         logger.info(f"🔄 {symbol}: Анализ для SHORT...")
         
         try:
-            klines_url = f"{self.rest_url}/api/v1/contract/kline/{symbol}"
-            async with self.session.get(klines_url, params={"interval": "Min1", "limit": 100}) as resp:
-                klines = []
-                if resp.status == 200:
-                    try:
-                        data = await resp.json()
-                        if data.get("success") and isinstance(data.get("data"), list):
-                            for k in data.get("data", []):
-                                if isinstance(k, dict):
-                                    try:
-                                        klines.append({
-                                            "timestamp": k["time"],
-                                            "open": float(k["open"]),
-                                            "high": float(k["high"]),
-                                            "low": float(k["low"]),
-                                            "close": float(k["close"]),
-                                            "volume": float(k["vol"])
-                                        })
-                                    except (KeyError, ValueError, TypeError):
-                                        continue
-                    except Exception as e:
-                        logger.error(f"{symbol}: Ошибка klines: {e}")
-            
-            ob_url = f"{self.rest_url}/api/v1/contract/depth/{symbol}"
-            async with self.session.get(ob_url, params={"limit": 20}) as resp:
-                orderbook = None
-                if resp.status == 200:
-                    try:
-                        data = await resp.json()
-                        if data.get("success"):
-                            orderbook = data.get("data")
-                    except Exception as e:
-                        logger.error(f"{symbol}: Ошибка orderbook: {e}")
+            # 🚀 Свечи и стакан параллельно
+            raw_klines, orderbook = await asyncio.gather(
+                self._fetch_klines(symbol, limit=100),
+                self._get_orderbook(symbol, limit=20)
+            )
+            
+            # Свечи уже типизированы msgspec - только переименование полей
+            klines = [
+                {
+                    "timestamp": k.time,
+                    "open": k.open,
+                    "high": k.high,
+                    "low": k.low,
+                    "close": k.close,
+                    "volume": k.vol
+                }
+                for k in raw_klines
+            ]
             
             # Fallback: создаем klines из снапшотов
             if not klines:
                 if symbol in self.price_snapshots and len(self.price_snapshots[symbol]) >= 5:
-                    snapshots = self.price_snapshots[symbol][-100:]
-                    minute_data = defaultdict(list)
-                    
-                    for snap in snapshots:
-                        timestamp_ms = snap[0]
-                        price = snap[1]
-                        volume = snap[2]
-                        minute_key = int(timestamp_ms / 60000) * 60000
-                        minute_data[minute_key].append((price, volume))
-                    
-                    for minute_ts in sorted(minute_data.keys()):
-                        prices = [p[0] for p in minute_data[minute_ts]]
-                        volumes = [p[1] for p in minute_data[minute_ts]]
-                        klines.append({
-                            "timestamp": minute_ts,
-                            "open": prices[0],
-                            "high": max(prices),
-                            "low": min(prices),
-                            "close": prices[-1],
-                            "volume": sum(volumes) / len(volumes)
-                        })
+                    klines = self._minute_bars(symbol)
             
             if not klines:
                 return None
             
-            snapshots = self.price_snapshots[symbol][-100:]
-            price_history = [s[1] for s in snapshots]
-            volume_history = [s[2] for s in snapshots]
+            price_history, volume_history = self._history_arrays(symbol, 100)
             
             signal = await self.signal_generator.generate_signal(
                 symbol=symbol,
@@ -1155,24 +1577,22 @@ _Analyzing..._
             
             if signal:
                 # 🔒 УСТАНОВИТЬ COOLDOWN ДО ОТПРАВКИ (защита от дублей)
-                self.signal_cooldown[symbol] = datetime.now()
+                self.signal_cooldown[symbol] = time.monotonic()
                 
                 self.signal_count += 1
                 logger.info(f"🎯 Сигнал #{self.signal_count} для {symbol}")
                 
                 msg = self.signal_generator.format_signal_message(signal)
                 
-                from telegram import InlineKeyboardButton, InlineKeyboardMarkup
-                
                 mexc_url = f"https://futures.mexc.com/exchange/{symbol}?type=linear_swap"
-                buttons = [[InlineKeyboardButton("📈 MEXC Futures", url=mexc_url)]]
+                links = [("📈 MEXC Futures", mexc_url)]
                 
                 if signal.get('dex_data'):
                     dex_info = signal['dex_data']
                     dex_url = f"https://dexscreener.com/{dex_info['chain']}/{dex_info.get('pair_address', '')}"
-                    buttons.append([InlineKeyboardButton("🦄 DexScreener", url=dex_url)])
+                    links.append(("🦄 DexScreener", dex_url))
                 
-                keyboard = InlineKeyboardMarkup(buttons)
+                keyboard = _link_keyboard(*links)
 
                 await self.broadcast_message(
                     text=msg,
@@ -1182,24 +1602,26 @@ _Analyzing..._
                 )
                 
                 try:
-                    pump_id = self.db.add_pump(
-                        symbol=pump_data['symbol'],
-                        price_start=pump_data['price_start'],
-                        price_peak=pump_data['price_peak'],
-                        price_increase_pct=pump_data['increase_pct'],
-                        volume_spike=pump_data['volume_spike'],
-                        timeframe_minutes=pump_data['timeframe_minutes']
-                    )
-                    self.db.add_signal(
-                        pump_id=pump_id,
-                        symbol=symbol,
-                        entry_price=signal['entry_price'],
-                        stop_loss=None,
-                        take_profits=[],
-                        risk_reward=0,
-                        quality_score=signal['quality_score'],
-                        factors=signal['factors'],
-                        weights=signal['weights']
+                    await asyncio.to_thread(
+                        self._persist_signal,
+                        dict(
+                            symbol=pump_data['symbol'],
+                            price_start=pump_data['price_start'],
+                            price_peak=pump_data['price_peak'],
+                            price_increase_pct=pump_data['increase_pct'],
+                            volume_spike=pump_data['volume_spike'],
+                            timeframe_minutes=pump_data['timeframe_minutes']
+                        ),
+                        dict(
+                            symbol=symbol,
+                            entry_price=signal['entry_price'],
+                            stop_loss=None,
+                            take_profits=[],
+                            risk_reward=0,
+                            quality_score=signal['quality_score'],
+                            factors=signal['factors'],
+                            weights=signal['weights']
+                        )
                     )
                     
                     # Регистрируем в трекере результатов
@@ -1262,7 +1684,28 @@ _Analyzing..._
         else:
             wr_emoji = "❌"
         
-        msg = f"""
+        if brain_stats.get('total', 0) == 0:
+            msg = """
+━━━━━━━━━━━━━━━━━━━━
+📊 *СТАТИСТИКА*
+━━━━━━━━━━━━━━━━━━━━
+
+📭 *Данных пока нет*
+
+После первых сигналов здесь появится:
+• Win Rate по всем монетам
+• Лучшие и худшие монеты
+• ML модель (после 20 сигналов)
+• История по каждой монете
+
+_Бот запущен и готов к работе!_ 🚀
+━━━━━━━━━━━━━━━━━━━━
+"""
+            await update.message.reply_text(msg, parse_mode='Markdown')
+            return
+        
+        # Строки собираем в список и склеиваем один раз в конце
+        parts = [f"""
 ━━━━━━━━━━━━━━━━━━━━
 📊 *СТАТИСТИКА БОТА*
 ━━━━━━━━━━━━━━━━━━━━
@@ -1278,172 +1721,194 @@ _Analyzing..._
 🤖 *ML MODEL*
 ┌─────────────────────
 │ Статус: {'🟢 Обучена' if ml_status.get('is_trained') else '🔴 Ждёт данных'}
-│ Сэмплов: `{ml_status.get('training_samples', 0)}/20`
-"""
+│ Сэмплов: `{ml_status.get('training_samples', 0)}/20`"""]
         
         # Progress bar для ML
         ml_progress = min(ml_status.get('training_samples', 0), 20)
         filled = "█" * (ml_progress // 2)
         empty = "░" * (10 - ml_progress // 2)
-        msg += f"│ [{filled}{empty}]\n"
-        msg += "└─────────────────────\n"
+        parts.append(f"│ [{filled}{empty}]")
+        parts.append("└─────────────────────")
         
         # Top features
         if ml_status.get('top_features'):
-            msg += "\n🎯 *ВАЖНЫЕ ФАКТОРЫ*\n"
+            parts.append("\n🎯 *ВАЖНЫЕ ФАКТОРЫ*")
             for i, (feat, imp) in enumerate(ml_status['top_features'][:3], 1):
                 feat_name = feat.replace('_score', '').replace('_', ' ').title()
                 bar_len = int(abs(imp) * 20)
                 bar = "▓" * min(bar_len, 10)
-                msg += f"{i}. {feat_name}: {bar}\n"
+                parts.append(f"{i}. {feat_name}: {bar}")
         
         # Best coins from GOD BRAIN memory
         if self.god_brain.coin_memory:
-            msg += "\n🏆 *TOP МОНЕТЫ*\n"
-            sorted_coins = sorted(
-                self.god_brain.coin_memory.items(),
-                key=lambda x: x[1].get('win_rate', 0) * x[1].get('total_signals', 0),
-                reverse=True
-            )[:3]
-            for sym, data in sorted_coins:
+            parts.append("\n🏆 *TOP МОНЕТЫ*")
+            for sym, data in self.god_brain.get_top_coins(3):
                 coin_wr = data.get('win_rate', 0) * 100
                 total = data.get('total_signals', 0)
                 if total > 0:
-                    msg += f"• `{sym}` — {coin_wr:.0f}% WR ({total} сигналов)\n"
+                    parts.append(f"• `{sym}` — {coin_wr:.0f}% WR ({total} сигналов)")
         
         # Active tracking
-        msg += f"\n⏱️ *АКТИВНЫЕ*\n"
-        msg += f"├ Отслеживаний: `{stats['active_tracking']}`\n"
-        msg += f"└ Trailing TP: `{trailing_status['active_count']}`\n"
+        parts.append(f"\n⏱️ *АКТИВНЫЕ*")
+        parts.append(f"├ Отслеживаний: `{stats['active_tracking']}`")
+        parts.append(f"└ Trailing TP: `{trailing_status['active_count']}`")
         
         # Uptime indicator
-        msg += f"\n━━━━━━━━━━━━━━━━━━━━"
+        parts.append(f"\n━━━━━━━━━━━━━━━━━━━━")
         
-        if brain_stats.get('total', 0) == 0:
-            msg = """
-━━━━━━━━━━━━━━━━━━━━
-📊 *СТАТИСТИКА*
-━━━━━━━━━━━━━━━━━━━━
+        msg = "\n".join(parts)
+        
+        await update.message.reply_text(msg, parse_mode='Markdown')
 
-📭 *Данных пока нет*
+    @staticmethod
+    def _split_message(text: str, limit: int = 3800) -> List[str]:
+        """Разбить текст на части <= limit по границам секций (\n\n), затем строк"""
+        if len(text) <= limit:
+            return [text]
+        
+        chunks = []
+        current = ""
+        for block in text.split("\n\n"):
+            # Слишком длинная секция - режем по строкам (крайний случай - жёстко)
+            pieces = [block] if len(block) <= limit else [
+                line[i:i + limit] for line in block.split("\n") for i in range(0, max(len(line), 1), limit)
+            ]
+            sep = "\n\n" if len(pieces) == 1 else "\n"
+            for piece in pieces:
+                candidate = f"{current}{sep}{piece}" if current else piece
+                if len(candidate) <= limit:
+                    current = candidate
+                else:
+                    chunks.append(current)
+                    current = piece
+        if current:
+            chunks.append(current)
+        return chunks
 
-После первых сигналов здесь появится:
-• Win Rate по всем монетам
-• Лучшие и худшие монеты
-• ML модель (после 20 сигналов)
-• История по каждой монете
+    async def _edit_if_changed(self, message, text: str, **kwargs):
+        """edit_text только если текст изменился (иначе Telegram: 'message is not modified')"""
+        key = message.message_id
+        h = hash(text)
+        if self._last_edit_hash.get(key, hash(message.text)) == h:
+            return
+        await message.edit_text(text, **kwargs)
+        self._last_edit_hash[key] = h
+        if len(self._last_edit_hash) > 1000:
+            self._last_edit_hash.clear()
 
-_Бот запущен и готов к работе!_ 🚀
-━━━━━━━━━━━━━━━━━━━━
-"""
+    async def _build_listing_message(self) -> str:
+        """Собрать текст /listing: MEXC фьючерсы + Telegram анонсы + Binance"""
+        parts = []  # строки ответа, склеиваются один раз в конце
         
-        await update.message.reply_text(msg, parse_mode='Markdown')
+        # 1. Новые фьючерсы MEXC за 24ч
+        mexc_listings = await self.listing_detector.get_recent_listings(hours=24)
+        if mexc_listings:
+            parts.append("📅 **Новые фьючерсы MEXC (24ч)**\n")
+            for item in mexc_listings[:7]:
+                symbol = item['symbol']
+                time_str = item['time_str']
+                lev = item.get('leverage', 0)
+                mexc_link = f"https://futures.mexc.com/exchange/{symbol}_USDT"
+                parts.append(f"• [{symbol}]({mexc_link}) — {time_str} (x{lev})")
+            parts.append("")
+        
+        # 2. Анонсы из Telegram канала MEXC
+        try:
+            from telegram_parser import SimpleTelegramParser
+            tg_parser = SimpleTelegramParser()
+            tg_listings = await tg_parser.get_listings()
+            
+            if tg_listings:
+                parts.append("📢 **Анонсы из Telegram MEXC**\n")
+                for item in tg_listings[:5]:
+                    symbols = item.get('symbols', [])
+                    listing_type = "🔮 Фьючерс" if item.get('type') == 'futures' else "💰 Спот"
+                    trading_time = item.get('trading_time', '')
+                    
+                    for sym in symbols[:2]:
+                        if trading_time:
+                            parts.append(f"{listing_type} **{sym}** — {trading_time}")
+                        else:
+                            parts.append(f"{listing_type} **{sym}**")
+                parts.append("")
+        except Exception as tg_err:
+            logger.warning(f"Telegram parser: {tg_err}")
+        
+        # 3. Binance анонсы (индикатор)
+        try:
+            parser = self.announcement_parser
+            binance_listings = await parser.get_binance_new_listings() if parser else []
+            
+            if binance_listings:
+                parts.append("🔮 **Binance анонсы** _(индикатор)_\n")
+                candidates = [item['symbols'][0] for item in binance_listings[:5] if item.get('symbols')]
+                
+                # Проверки MEXC параллельно (не больше 5 одновременных запросов)
+                sem = asyncio.Semaphore(5)
+                
+                async def _check(sym):
+                    async with sem:
+                        return await parser.check_mexc_has_futures(sym)
+                
+                results = await asyncio.gather(*map(_check, candidates), return_exceptions=True)
+                for sym, mexc_data in zip(candidates, results):
+                    if isinstance(mexc_data, Exception):
+                        logger.debug(f"MEXC check {sym}: {mexc_data}")
+                        mexc_data = None
+                    if mexc_data:
+                        mexc_link = f"https://futures.mexc.com/exchange/{mexc_data['symbol']}"
+                        parts.append(f"✅ [{sym}]({mexc_link}) — на MEXC")
+                    else:
+                        parts.append(f"⏳ **{sym}** — ждём")
+        except Exception as bn_err:
+            logger.warning(f"Binance parser: {bn_err}")
+        
+        return "\n".join(parts) or "⚠️ Нет данных о листингах\n\n_Совет: следите за каналом @MEXCOfficialNews_"
+    
+    async def _listing_refresh_loop(self):
+        """Фоновое обновление /listing: один скрейп на всех пользователей"""
+        while not self._stop_event.is_set():
+            try:
+                self._listing_cache = (time.monotonic(), await self._build_listing_message())
+            except Exception as e:
+                logger.warning(f"Обновление листингов: {e}")
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), timeout=self.listing_refresh_interval)
+            except asyncio.TimeoutError:
+                pass
 
     async def listing_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Команда /listing - календарь листингов"""
         status_msg = await update.message.reply_text("🔄 Загружаю данные о листингах...")
         
         try:
-            msg = ""
-            
-            # 1. Новые фьючерсы MEXC за 24ч
-            mexc_listings = await self.listing_detector.get_recent_listings(hours=24)
-            if mexc_listings:
-                msg += "📅 **Новые фьючерсы MEXC (24ч)**\n\n"
-                for item in mexc_listings[:7]:
-                    symbol = item['symbol']
-                    time_str = item['time_str']
-                    lev = item.get('leverage', 0)
-                    mexc_link = f"https://futures.mexc.com/exchange/{symbol}_USDT"
-                    msg += f"• [{symbol}]({mexc_link}) — {time_str} (x{lev})\n"
-                msg += "\n"
-            
-            # 2. Анонсы из Telegram канала MEXC
-            try:
-                from telegram_parser import SimpleTelegramParser
-                tg_parser = SimpleTelegramParser()
-                tg_listings = await tg_parser.get_listings()
-                
-                if tg_listings:
-                    msg += "📢 **Анонсы из Telegram MEXC**\n\n"
-                    for item in tg_listings[:5]:
-                        symbols = item.get('symbols', [])
-                        listing_type = "🔮 Фьючерс" if item.get('type') == 'futures' else "💰 Спот"
-                        trading_time = item.get('trading_time', '')
-                        
-                        for sym in symbols[:2]:
-                            if trading_time:
-                                msg += f"{listing_type} **{sym}** — {trading_time}\n"
-                            else:
-                                msg += f"{listing_type} **{sym}**\n"
-                    msg += "\n"
-            except Exception as tg_err:
-                logger.warning(f"Telegram parser: {tg_err}")
-            
-            # 3. Binance анонсы (индикатор)
-            try:
-                from announcement_parser import AnnouncementParser
-                parser = AnnouncementParser()
-                binance_listings = await parser.get_binance_new_listings()
-                
-                if binance_listings:
-                    msg += "🔮 **Binance анонсы** _(индикатор)_\n\n"
-                    shown = 0
-                    for item in binance_listings[:5]:
-                        for sym in item.get('symbols', [])[:1]:
-                            mexc_data = await parser.check_mexc_has_futures(sym)
-                            if mexc_data:
-                                mexc_link = f"https://futures.mexc.com/exchange/{mexc_data['symbol']}"
-                                msg += f"✅ [{sym}]({mexc_link}) — на MEXC\n"
-                            else:
-                                msg += f"⏳ **{sym}** — ждём\n"
-                            shown += 1
-                            if shown >= 5:
-                                break
-                        if shown >= 5:
-                            break
-            except Exception as bn_err:
-                logger.warning(f"Binance parser: {bn_err}")
-            
-            if not msg:
-                msg = "⚠️ Нет данных о листингах\n\n_Совет: следите за каналом @MEXCOfficialNews_"
-            
-            await status_msg.edit_text(msg, parse_mode='Markdown', disable_web_page_preview=True)
+            cached_at, msg = self._listing_cache
+            if not msg or time.monotonic() - cached_at > self.listing_cache_ttl:
+                # Фоновое обновление ещё не успело / отстало - собираем сами
+                msg = await self._build_listing_message()
+                self._listing_cache = (time.monotonic(), msg)
+            
+            # Telegram режет >4096 символов: первая часть - в статус, остальное отдельными тихими сообщениями
+            chunks = self._split_message(msg)
+            await self._edit_if_changed(status_msg, chunks[0], parse_mode='Markdown', disable_web_page_preview=True)
+            for chunk in chunks[1:]:
+                await self.app.bot.send_message(
+                    chat_id=update.effective_chat.id,
+                    message_thread_id=status_msg.message_thread_id,
+                    text=chunk,
+                    parse_mode='Markdown',
+                    disable_web_page_preview=True,
+                    disable_notification=True
+                )
         except Exception as e:
             logger.error(f"Ошибка /listing: {e}", exc_info=True)
-            await status_msg.edit_text(f"❌ Ошибка: {e}")
+            await self._edit_if_changed(status_msg, f"❌ Ошибка: {e}")
 
     async def test_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Тестовый сигнал"""
-        fake_signal = {
-            "symbol": "TEST/USDT",
-            "entry_price": 0.045,
-            "quality_score": 9.5,
-            "raw_quality_score": 9.5,
-            "reliability_score": 8.5,
-            "pump_increase_pct": 23.5,
-            "factors": {
-                "divergence_score": 7,
-                "volume_drop_pct": 65,
-                "orderbook_score": 8,
-                "rsi_value": 78,
-                "funding_score": 5,
-                "mtf_score": 0,
-                "whale_score": 8,
-                "dex_score": 10,
-                "dex_spread_pct": 16.88
-            },
-            "dex_data": {
-                "price": 0.0385,
-                "dex_name": "Uniswap",
-                "chain": "ethereum",
-                "liquidity": 500000
-            },
-            "whale_data": {"whale_sells_appeared": True}
-        }
-        
-        msg = self.signal_generator.format_signal_message(fake_signal)
-        await update.message.reply_text(msg, parse_mode='Markdown', disable_web_page_preview=True)
+        if RestPumpDetector._TEST_MSG is None:
+            RestPumpDetector._TEST_MSG = self.signal_generator.format_signal_message(_FAKE_SIGNAL)
+        await update.message.reply_text(RestPumpDetector._TEST_MSG, parse_mode=ParseMode.MARKDOWN, disable_web_page_preview=True)
 
     async def announce_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """
@@ -1455,21 +1920,27 @@ _Бот запущен и готов к работе!_ 🚀
             return
             
         # Способ 1: Ответ на сообщение (reply)
+        # Текст админа берём в MarkdownV2 из его entities: жирный/курсив/ссылки
+        # сохраняются, а спецсимволы обычного текста PTB экранирует сам
         if message.reply_to_message:
-            announcement_text = message.reply_to_message.text or message.reply_to_message.caption
-            if not announcement_text:
+            reply = message.reply_to_message
+            if reply.text:
+                announcement_text = reply.text_markdown_v2
+            elif reply.caption:
+                announcement_text = reply.caption_markdown_v2
+            else:
                 await message.reply_text("⚠️ Ответь на текстовое сообщение!")
                 return
         # Способ 2: Текст после команды
         elif message.text and len(message.text) > 10:
-            announcement_text = message.text.replace("/announce ", "").replace("/announce", "").strip()
+            announcement_text = _ANNOUNCE_RE.sub('', message.text_markdown_v2).strip()
         else:
             await message.reply_text(
-                "📢 **Как использовать:**\n\n"
-                "**Способ 1:** Ответь на любое сообщение командой /announce\n\n"
-                "**Способ 2:** `/announce Текст объявления`\n\n"
-                "💡 Для переносов строк используй Enter при вводе!",
-                parse_mode='Markdown'
+                "📢 *Как использовать:*\n\n"
+                "*Способ 1:* Ответь на любое сообщение командой /announce\n\n"
+                "*Способ 2:* `/announce Текст объявления`\n\n"
+                "💡 Для переносов строк используй Enter при вводе\\!",
+                parse_mode=ParseMode.MARKDOWN_V2
             )
             return
         
@@ -1478,36 +1949,61 @@ _Бот запущен и готов к работе!_ 🚀
             return
         
         # Форматируем объявление
-        msg = f"📢 *ОБЪЯВЛЕНИЕ*\n\n{announcement_text}\n\n_— Админ MMR Bot_"
+        # Экранируется только текст бота; текст админа - уже готовый MarkdownV2
+        msg = f"📢 *ОБЪЯВЛЕНИЕ*\n\n{announcement_text}\n\n_{_esc_md2('— Админ MMR Bot')}_"
         
         # Отправляем в группу
         try:
-            await self.app.bot.send_message(
+            await self._send_with_retry(lambda: self.app.bot.send_message(
                 chat_id=self.chat_id,
                 message_thread_id=self.topic_id,
                 text=msg,
-                parse_mode='Markdown'
-            )
+                parse_mode=ParseMode.MARKDOWN_V2
+            ))
             await update.message.reply_text("✅ Объявление отправлено в группу!")
         except Exception as e:
             logger.error(f"Ошибка отправки объявления: {e}")
             await update.message.reply_text(f"❌ Ошибка: {e}")
     
-    async def broadcast_message(self, text: str, parse_mode='Markdown', reply_markup=None, disable_web_page_preview=True):
+    async def _send_with_retry(self, coro_factory, tries: int = 5):
+        """
+        Отправка в Telegram с повторами: RetryAfter - ждём сколько сказал сервер,
+        таймаут/сеть - экспоненциальный backoff (до 30с). Последняя ошибка пробрасывается.
+        BadRequest/Forbidden (разметка, чат, тема, права) постоянны - без повторов.
+        """
+        for attempt in range(tries):
+            try:
+                return await coro_factory()
+            except (BadRequest, Forbidden):
+                # BadRequest - подкласс NetworkError: ловим раньше, повтор ничего не изменит
+                raise
+            except RetryAfter as e:
+                if attempt == tries - 1:
+                    raise
+                retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+                logger.warning(f"⏳ Telegram flood limit, ждём {retry_after}с")
+                await asyncio.sleep(retry_after + 0.5)
+            except (TimedOut, NetworkError) as e:
+                if attempt == tries - 1:
+                    raise
+                logger.warning(f"⚠️ Telegram {type(e).__name__}, повтор #{attempt + 1}")
+                await asyncio.sleep(min(2 ** attempt, 30))
+    
+    async def broadcast_message(self, text: str, parse_mode=ParseMode.MARKDOWN, reply_markup=None, disable_web_page_preview=True):
         """Отправить сообщение в группу (в указанную тему)"""
         try:
             if not self.app:
                 logger.warning("⚠️ Telegram бот еще не инициализирован, сообщение не отправлено")
                 return
                 
-            await self.app.bot.send_message(
+            await self._send_with_retry(lambda: self.app.bot.send_message(
                 chat_id=self.chat_id,
                 message_thread_id=self.topic_id,
                 text=text,
                 parse_mode=parse_mode,
                 reply_markup=reply_markup,
                 disable_web_page_preview=disable_web_page_preview
-            )
+            ))
             logger.info(f"✅ Сообщение отправлено в Telegram (канал: {self.chat_id}, тема: {self.topic_id})")
         except Exception as e:
             logger.error(f"Ошибка отправки в группу: {e}")
@@ -1518,32 +2014,23 @@ _Бот запущен и готов к работе!_ 🚀
             stats = self.signal_tracker.get_statistics()
             brain_stats = self.god_brain.get_statistics()
             
-            total_pumps = self.pump_count
-            total_signals = self.signal_count
-            wr = brain_stats.get('win_rate', 0) * 100
-            
-            msg = f"""
-📊 **ЕЖЕДНЕВНЫЙ ОТЧЁТ**
-━━━━━━━━━━━━━━━
-
-🚀 Пампов обнаружено: `{total_pumps}`
-🎯 Сигналов отправлено: `{total_signals}`
-
-📈 **Результаты:**
-✅ WIN: `{brain_stats.get('wins', 0)}`
-❌ LOSS: `{brain_stats.get('losses', 0)}`
-📊 Win Rate: **{wr:.1f}%**
-
-💰 Средний профит: `{stats.get('avg_profit', 0):.1f}%`
-🎲 Активных трекингов: `{stats.get('active_tracking', 0)}`
-"""
+            msg = _DAILY_TEMPLATE.format_map({
+                'pumps': self.pump_count,
+                'signals': self.signal_count,
+                'wins': brain_stats.get('wins', 0),
+                'losses': brain_stats.get('losses', 0),
+                'wr': _esc_md2(f"{brain_stats.get('win_rate', 0) * 100:.1f}"),
+                'avg_profit': stats.get('avg_profit', 0),
+                'active': stats.get('active_tracking', 0)
+            })
             
             if stats.get('best_coins'):
-                msg += "\n🏆 **Топ монеты:**\n"
-                for sym, profit, wins, losses in stats['best_coins'][:3]:
-                    msg += f"  • {sym}: +{profit:.1f}% ({wins}W/{losses}L)\n"
+                msg += "\n🏆 *Топ монеты:*\n" + "".join(
+                    f"  • {_esc_md2(sym)}: {_esc_md2(f'+{profit:.1f}% ({wins}W/{losses}L)')}\n"
+                    for sym, profit, wins, losses in islice(stats['best_coins'], 3)
+                )
             
-            await self.broadcast_message(msg)
+            await self.broadcast_message(msg, parse_mode=ParseMode.MARKDOWN_V2)
             logger.info("📊 Ежедневный отчёт отправлен")
             
         except Exception as e:
@@ -1551,34 +2038,99 @@ _Бот запущен и готов к работе!_ 🚀
     
     async def auto_reports_loop(self):
         """Фоновая задача для автоматических отчётов"""
+        fired_date = None  # Дата последнего отчёта - защита от двойной отправки
         while True:
             try:
+                # Спим ровно до следующих 23:59 - без ежеминутных проверок
                 now = datetime.now()
-                # Отправляем отчёт в 23:59
-                if now.hour == 23 and now.minute == 59:
+                target = now.replace(hour=23, minute=59, second=0, microsecond=0)
+                if target <= now:
+                    target += timedelta(days=1)
+                await asyncio.sleep((target - now).total_seconds())
+                if fired_date != target.date():
                     await self.send_daily_report()
-                    await asyncio.sleep(120)  # Спим 2 мин чтобы не дублировать
-                else:
-                    await asyncio.sleep(60)  # Проверяем каждую минуту
+                    fired_date = target.date()
             except Exception as e:
                 logger.error(f"Ошибка в auto_reports_loop: {e}")
                 await asyncio.sleep(60)
 
+    async def _supervise(self, name: str, factory):
+        """
+        Держит фоновую задачу живой: при падении - лог и перезапуск
+        с экспоненциальным backoff (1с → 60с), до остановки бота.
+        """
+        backoff = 1
+        while not self._stop_event.is_set():
+            try:
+                await factory()
+                backoff = 1
+                if self._stop_event.is_set():
+                    break
+                logger.warning(f"🔁 {name}: задача завершилась, перезапуск")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"💥 {name}: задача упала: {e}", exc_info=True)
+                backoff = min(backoff * 2, 60)
+            await asyncio.sleep(backoff)
+
+    async def _dispatch_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Вызвать обработчик команды: /cmd@BotName args → self._cmds['cmd']"""
+        message = update.effective_message
+        if not message or not message.text:
+            return
+        command = message.text.split(maxsplit=1)[0][1:].split('@')[0].lower()
+        handler = self._cmds.get(command)
+        if handler:
+            await handler(update, context)
+
     async def run(self):
         """Запуск бота"""
         await self.start_session()
         
-        self.app = Application.builder().token(self.telegram_token).build()
-        self.app.add_handler(CommandHandler("start", self.start_command))
-        self.app.add_handler(CommandHandler("status", self.status_command))
-        self.app.add_handler(CommandHandler("stats", self.stats_command))
-        self.app.add_handler(CommandHandler("listing", self.listing_command))
-        self.app.add_handler(CommandHandler("test", self.test_command))
-        self.app.add_handler(CommandHandler("announce", self.announce_command))
+        # Буферы снимков для всех известных пар заранее - в горячем цикле без создания ключей
+        for symbol in await self.get_all_symbols():
+            self.price_snapshots.setdefault(symbol, self._new_snapshot_buffer())
+        
+        # 🚦 Лимиты Telegram: 30 msg/s всего, 20 msg/мин в группу - очередь вместо 429
+        # Лимитер только выдерживает темп; повторы (RetryAfter и сеть) - один слой в _send_with_retry
+        rate_limiter = AIORateLimiter(
+            overall_max_rate=30, overall_time_period=1,
+            group_max_rate=20, group_time_period=60,
+            max_retries=0
+        )
+        self.app = (
+            Application.builder()
+            .token(self.telegram_token)
+            .request(OrjsonHTTPXRequest(connection_pool_size=64))
+            .get_updates_request(OrjsonHTTPXRequest())
+            .rate_limiter(rate_limiter)
+            .build()
+        )
+        # Один CommandHandler на все команды - маршрутизация по таблице
+        self._cmds = {
+            'start': self.start_command,
+            'status': self.status_command,
+            'stats': self.stats_command,
+            'listing': self.listing_command,
+            'test': self.test_command,
+            'announce': self.announce_command,
+        }
+        self.app.add_handler(CommandHandler(list(self._cmds), self._dispatch_command))
         
         await self.app.initialize()
         await self.app.start()
-        await self.app.updater.start_polling()
+        if self.use_webhook:
+            await self.app.updater.start_webhook(
+                listen=self.webhook_listen,
+                port=self.webhook_port,
+                url_path=self.webhook_secret,
+                webhook_url=f"{self.webhook_url.rstrip('/')}/{self.webhook_secret}",
+                secret_token=self.webhook_secret
+            )
+            logger.info(f"🌐 Telegram webhook на порту {self.webhook_port}")
+        else:
+            await self.app.updater.start_polling()
         
         logger.info("✅ Telegram бот запущен (TURBO: 1.5s)")
         
@@ -1589,23 +2141,69 @@ _Бот запущен и готов к работе!_ 🚀
         )
         
         # Запускаем детектор листингов в фоне
-        listing_task = asyncio.create_task(self.listing_detector.run())
+        listing_task = asyncio.create_task(self._supervise('listing', lambda: self.listing_detector.run(self.session)))
+        
+        # 📡 Запускаем WS-поток стаканов
+        depth_task = asyncio.create_task(self._supervise('depth', lambda: self.depth_stream.run(self.session)))
         
         # Запускаем трекер сигналов в фоне
-        tracker_task = asyncio.create_task(self.signal_tracker.run())
+        tracker_task = asyncio.create_task(self._supervise('tracker', lambda: self.signal_tracker.run(self.session)))
         
         # 📊 Запускаем автоматические отчёты
-        reports_task = asyncio.create_task(self.auto_reports_loop())
+        reports_task = asyncio.create_task(self._supervise('reports', self.auto_reports_loop))
+        
+        # 📅 Фоновое обновление /listing
+        listing_cache_task = asyncio.create_task(self._supervise('listing_cache', self._listing_refresh_loop))
+        
+        # 📢 Отправитель алертов о пампах (вне цикла сканирования)
+        alerts_task = asyncio.create_task(self._supervise('alerts', self._alert_sender_loop))
+        
+        # 🛑 SIGINT/SIGTERM → мягкая остановка основного цикла
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, self._stop_event.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Windows: остаётся KeyboardInterrupt
         
         try:
-            while True:
-                await self.scan_market()
-                await asyncio.sleep(self.scan_interval)
+            # ⏱️ Дедлайны по monotonic: длительность скана не сдвигает каденс.
+            # Пока MEXC отвечает ошибками - экспоненциальный backoff, а не 20 запросов/сек
+            next_tick = time.monotonic()
+            while not self._stop_event.is_set():
+                if await self.scan_market():
+                    self._scan_failures = 0
+                elif self._scan_failures < 16:
+                    # Счётчик ограничен: при долгом простое MEXC 2 ** n не переполнит float
+                    # (2 ** 16 * scan_interval давно выше потолка max_scan_backoff)
+                    self._scan_failures += 1
+                next_tick += min(self.scan_interval * 2 ** self._scan_failures, self.max_scan_backoff)
+                delay = next_tick - time.monotonic()
+                if delay > 0:
+                    try:
+                        await asyncio.wait_for(self._stop_event.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    logger.debug(f"⏱️ Скан превысил интервал на {-delay:.2f}с")
+                    next_tick = time.monotonic()  # Ресинк после перегрузки
+            logger.info("Остановка...")
         
         except KeyboardInterrupt:
             logger.info("Остановка...")
         finally:
+            self._stop_event.set()  # Супервизоры не перезапускают задачи
+            self.listing_detector.stop()
+            self.signal_tracker.stop()
+            self.depth_stream.stop()
+            # Вместе с сервисами - незавершённые анализы (до закрытия сессии и БД)
+            background = (listing_task, depth_task, tracker_task, reports_task, listing_cache_task,
+                          alerts_task, *self._background_tasks)
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
             await self.close_session()
+            self.db.close()
             if self.app:
                 await self.app.updater.stop()
                 await self.app.stop()
@@ -2,6 +2,7 @@
 Coin Profiler - машинное обучение и профилирование монет
 """
 
+from collections import OrderedDict
 from typing import Dict, List, Optional
 from database import Database
 import numpy as np
@@ -13,6 +14,12 @@ logger = get_logger()
 class CoinProfiler:
     """Класс для обучения и адаптации под каждую монету"""
     
+    # Колонки весов в coin_profiles: divergence, volume, orderbook, rsi
+    _WEIGHT_KEYS = ('weight_divergence', 'weight_volume', 'weight_orderbook', 'weight_rsi')
+    
+    # Сколько монет держать в кэше весов (LRU)
+    _WEIGHTS_CACHE_SIZE = 2048
+    
     def __init__(self, database: Database, config: Dict):
         """
         Инициализация профайлера
@@ -27,6 +34,10 @@ class CoinProfiler:
         self.min_signals = config['min_signals_for_learning']
         self.learning_rate = config['learning_rate']
         self.initial_weights = config['initial_weights']
+        
+        # symbol -> веса. Профиль меняется только через этот класс,
+        # поэтому кэш сбрасывается при каждой записи профиля
+        self._weights_cache: OrderedDict = OrderedDict()
     
     def get_weights_for_coin(self, symbol: str) -> Dict[str, float]:
         """
@@ -41,12 +52,17 @@ class CoinProfiler:
         if not self.enabled:
             return self.initial_weights
         
+        weights = self._weights_cache.get(symbol)
+        if weights is not None:
+            self._weights_cache.move_to_end(symbol)
+            return weights.copy()
+        
         # Получаем профиль из БД
         profile = self.db.get_coin_profile(symbol)
         
         if profile and profile['total_signals'] >= self.min_signals:
             # Используем адаптированные веса
-            return {
+            weights = {
                 "divergence": profile['weight_divergence'],
                 "volume_drop": profile['weight_volume'],
                 "orderbook": profile['weight_orderbook'],
@@ -54,7 +70,12 @@ class CoinProfiler:
             }
         else:
             # Используем начальные веса
-            return self.initial_weights.copy()
+            weights = self.initial_weights.copy()
+        
+        self._weights_cache[symbol] = weights
+        if len(self._weights_cache) > self._WEIGHTS_CACHE_SIZE:
+            self._weights_cache.popitem(last=False)
+        return weights.copy()
     
     def update_coin_statistics(self, symbol: str, pump_data: Dict):
         """
@@ -91,6 +112,7 @@ class CoinProfiler:
                 **self.initial_weights  # Начальные веса
             })
         
+        self._weights_cache.pop(symbol, None)
         logger.debug(f"Обновлена статистика пампов для {symbol}")
     
     def learn_from_signal_outcome(self, signal_id: int):
@@ -104,8 +126,7 @@ class CoinProfiler:
             return
         
         # Получаем сигнал из БД
-        signals = self.db.get_recent_signals("", limit=1000)
-        signal = next((s for s in signals if s['id'] == signal_id), None)
+        signal = self.db.get_signal_by_id(signal_id)
         
         if not signal or signal['was_profitable'] is None:
             return
@@ -147,6 +168,7 @@ class CoinProfiler:
             'reliability_score': reliability,
             **weights
         })
+        self._weights_cache.pop(symbol, None)
         
         logger.info(f"Обучение на {symbol}: {new_successful}/{new_total} успешных "
                    f"(надёжность: {reliability:.1f}/10)")
@@ -164,49 +186,28 @@ class CoinProfiler:
         Returns:
             Обновлённые веса
         """
-        # Текущие веса
-        weights = {
-            'divergence': profile['weight_divergence'],
-            'volume': profile['weight_volume'],
-            'orderbook': profile['weight_orderbook'],
-            'rsi': profile['weight_rsi']
-        }
+        # Текущие веса (порядок - _WEIGHT_KEYS)
+        weights = np.array([profile[k] for k in self._WEIGHT_KEYS], dtype=np.float64)
         
         # Факторы сигнала (нормализованные 0-1)
-        factors = {
-            'divergence': (signal['divergence_score'] or 0) / 10.0,
-            'volume': (signal['volume_drop_pct'] or 0) / 100.0,
-            'orderbook': (signal['orderbook_score'] or 0) / 10.0,
-            'rsi': max(0, signal['rsi_value'] - 50) / 50.0 if signal['rsi_value'] else 0
-        }
-        
-        # Обновляем веса на основе исхода
-        for factor_name, factor_value in factors.items():
-            weight_key = f'weight_{factor_name}'
-            current_weight = weights[factor_name]
-            
-            # Если сигнал был прибыльным и фактор был сильным - увеличиваем вес
-            # Если сигнал был убыточным и фактор был сильным - уменьшаем вес
-            if was_profitable:
-                adjustment = self.learning_rate * factor_value
-            else:
-                adjustment = -self.learning_rate * factor_value
-            
-            # Обновляем вес с ограничениями (0.05 - 0.60)
-            new_weight = max(0.05, min(0.60, current_weight + adjustment))
-            weights[factor_name] = new_weight
-        
-        # Нормализуем веса чтобы сумма = 1.0
-        total = sum(weights.values())
-        if total > 0:
-            weights = {k: v / total for k, v in weights.items()}
-        
-        return {
-            'weight_divergence': weights['divergence'],
-            'weight_volume': weights['volume'],
-            'weight_orderbook': weights['orderbook'],
-            'weight_rsi': weights['rsi']
-        }
+        factors = np.array([
+            (signal['divergence_score'] or 0) / 10.0,
+            (signal['volume_drop_pct'] or 0) / 100.0,
+            (signal['orderbook_score'] or 0) / 10.0,
+            max(0, signal['rsi_value'] - 50) / 50.0 if signal['rsi_value'] else 0
+        ])
+        
+        # Если сигнал был прибыльным и фактор был сильным - увеличиваем вес
+        # Если сигнал был убыточным и фактор был сильным - уменьшаем вес
+        rate = self.learning_rate if was_profitable else -self.learning_rate
+        
+        # Обновляем веса с ограничениями (0.05 - 0.60)
+        weights = np.clip(weights + rate * factors, 0.05, 0.60)
+        
+        # Нормализуем веса чтобы сумма = 1.0 (после clip сумма всегда > 0)
+        weights /= weights.sum()
+        
+        return dict(zip(self._WEIGHT_KEYS, weights.tolist()))
     
     def get_coin_reliability(self, symbol: str) -> float:
         """
@@ -3,13 +3,170 @@ Database - управление базой данных для хранения
 """
 
 import sqlite3
-from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+import threading
+from contextlib import contextmanager
+import time
+from functools import lru_cache
+from typing import Iterator, List, Dict, Optional, Tuple
 import json
 from logger import get_logger
 
 logger = get_logger()
 
+# ═══════════════════════════════════════════════════════════════
+# SQL-ЗАПРОСЫ
+# Строки собраны один раз: sqlite3 кэширует подготовленные запросы
+# по тексту, и одинаковая строка на каждый вызов попадает в этот кэш
+# ═══════════════════════════════════════════════════════════════
+
+_SQL_INSERT_PUMP = '''
+    INSERT INTO pumps (symbol, detected_at, price_start, price_peak,
+                     price_increase_pct, volume_spike, timeframe_minutes, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_INSERT_SIGNAL = '''
+    INSERT INTO signals (
+        pump_id, symbol, generated_at, entry_price, stop_loss,
+        take_profit_1, take_profit_2, take_profit_3,
+        risk_reward_ratio, quality_score,
+        divergence_score, volume_drop_pct, orderbook_score, rsi_value,
+        weight_divergence, weight_volume, weight_orderbook, weight_rsi, weight_oi
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+_SQL_LAST_INSERT_ID = 'SELECT last_insert_rowid()'
+
+_SQL_SIGNAL_LEVELS = 'SELECT entry_price, stop_loss, take_profit_1 FROM signals WHERE id = ?'
+
+_SQL_UPDATE_SIGNAL_OUTCOME = '''
+    UPDATE signals
+    SET price_5m = ?, price_15m = ?, price_1h = ?, price_4h = ?,
+        was_profitable = ?, max_profitable_pct = ?
+    WHERE id = ?
+'''
+
+_SQL_GET_COIN_PROFILE = 'SELECT * FROM coin_profiles WHERE symbol = ?'
+
+_SQL_RECENT_SIGNALS = '''
+    SELECT * FROM signals
+    WHERE symbol = ?
+    ORDER BY generated_at DESC
+    LIMIT ?
+'''
+
+_SQL_SIGNAL_BY_ID = 'SELECT * FROM signals WHERE id = ? LIMIT 1'
+
+_SQL_STATS_ALL = '''
+    SELECT
+        COUNT(*) as total_signals,
+        SUM(was_profitable) as profitable_signals,
+        AVG(quality_score) as avg_quality,
+        AVG(max_profitable_pct) as avg_profit_pct
+    FROM signals
+'''
+
+_SQL_STATS_BY_SYMBOL = _SQL_STATS_ALL + 'WHERE symbol = ?\n'
+
+_SQL_DELETE_OLD_PUMPS = 'DELETE FROM pumps WHERE detected_at < ?'
+
+_SQL_DELETE_OLD_SIGNALS = 'DELETE FROM signals WHERE generated_at < ?'
+
+# Время хранится целыми Unix-секундами (сравнение чисел, а не ISO-строк,
+# и без устаревшего datetime-адаптера sqlite3). Старые строки из прежних
+# версий переводим один раз при старте: 'utc' - строки писались в локальном времени
+_SQL_MIGRATE_TIMESTAMPS = tuple(
+    f"UPDATE {table} SET {column} = CAST(strftime('%s', {column}, 'utc') AS INTEGER) "
+    f"WHERE typeof({column}) = 'text'"
+    for table, column in (('pumps', 'detected_at'), ('signals', 'generated_at'),
+                          ('coin_profiles', 'last_updated'))
+)
+
+_SQL_CREATE_SIGNALS = '''
+    CREATE TABLE IF NOT EXISTS signals (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        pump_id INTEGER NOT NULL,
+        symbol TEXT NOT NULL,
+        generated_at TIMESTAMP NOT NULL,
+        entry_price REAL NOT NULL,
+        stop_loss REAL,
+        take_profit_1 REAL,
+        take_profit_2 REAL,
+        take_profit_3 REAL,
+        risk_reward_ratio REAL,
+        quality_score REAL NOT NULL,
+        
+        -- Факторы анализа
+        divergence_score REAL,
+        volume_drop_pct REAL,
+        orderbook_score REAL,
+        rsi_value REAL,
+        
+        -- Веса, использованные для этого сигнала
+        weight_divergence REAL,
+        weight_volume REAL,
+        weight_orderbook REAL,
+        weight_rsi REAL,
+        weight_oi REAL,
+        
+        -- Исходы (заполняются позже)
+        price_5m REAL,
+        price_15m REAL,
+        price_1h REAL,
+        price_4h REAL,
+        
+        -- Эффективность
+        was_profitable BOOLEAN,
+        max_profitable_pct REAL,
+        
+        FOREIGN KEY (pump_id) REFERENCES pumps (id) ON DELETE CASCADE
+    )
+'''
+
+_SQL_SIGNAL_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_signals_generated_at ON signals(generated_at)',
+    # get_recent_signals: фильтр по symbol + ORDER BY generated_at DESC без сортировки
+    'CREATE INDEX IF NOT EXISTS idx_signals_symbol_gen ON signals(symbol, generated_at DESC)',
+    # get_statistics: агрегаты читаются только из индекса, без обращения к таблице
+    '''
+    CREATE INDEX IF NOT EXISTS idx_signals_stats
+    ON signals(symbol, was_profitable, quality_score, max_profitable_pct)
+    ''',
+)
+
+# ALTER TABLE ... DROP COLUMN появился в SQLite 3.35 (2021); в старых системных
+# SQLite (Debian bullseye, Ubuntu 20.04) таблицу пересоздаём
+_HAS_DROP_COLUMN = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Версия схемы (PRAGMA user_version).
+# 1: веса сигнала - REAL-колонки вместо JSON в signals.weights
+# 2: колонка weight_oi (вес Open Interest из SignalGenerator)
+_SCHEMA_VERSION = 2
+
+# Колонки весов в signals и ключи словаря весов. SignalGenerator пишет
+# rsi_level/volume_drop/orderbook/oi_factor; divergence - ключ весов профиля
+# (config.yaml: learning.initial_weights), его колонка остаётся для таких словарей
+_SIGNAL_WEIGHT_COLUMNS = (
+    ('weight_divergence', 'divergence'),
+    ('weight_volume', 'volume_drop'),
+    ('weight_orderbook', 'orderbook'),
+    ('weight_rsi', 'rsi_level'),
+    ('weight_oi', 'oi_factor'),
+)
+
+
+@lru_cache(maxsize=32)
+def _upsert_profile_sql(keys: Tuple[str, ...]) -> str:
+    """UPSERT профиля для набора колонок (набор почти всегда один и тот же)"""
+    columns = ", ".join(("symbol", "last_updated") + keys)
+    placeholders = ", ".join("?" * (len(keys) + 2))
+    set_clause = ", ".join([f"{k} = excluded.{k}" for k in keys] + ["last_updated = excluded.last_updated"])
+    return f'''
+        INSERT INTO coin_profiles ({columns})
+        VALUES ({placeholders})
+        ON CONFLICT(symbol) DO UPDATE SET {set_clause}
+    '''
+
 
 class Database:
     """Класс для работы с SQLite базой данных"""
@@ -22,19 +179,74 @@ class Database:
             db_path: Путь к файлу базы данных
         """
         self.db_path = db_path
+        self._local = threading.local()  # Соединение на поток (запись идёт и из asyncio.to_thread)
+        # Все открытые соединения - чтобы close() закрыл и соединения рабочих потоков to_thread
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
         self._create_tables()
         logger.info(f"База данных инициализирована: {db_path}")
     
     def _get_connection(self) -> sqlite3.Connection:
-        """Создать подключение к БД"""
-        conn = sqlite3.Connection(self.db_path)
-        conn.row_factory = sqlite3.Row
+        """Подключение к БД: одно на поток, открывается при первом обращении и переиспользуется"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Автокоммит: транзакции открываем сами (transaction) - BEGIN IMMEDIATE.
+            # check_same_thread=False только ради close() из главного потока -
+            # в работе соединение используется лишь своим потоком
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            # WAL: читатели не блокируют писателя; synchronous=NORMAL достаточно для WAL
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            conn.execute('PRAGMA mmap_size=268435456')
+            conn.execute('PRAGMA cache_size=-65536')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
         return conn
     
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Транзакция записи: BEGIN IMMEDIATE ... COMMIT (ROLLBACK при исключении).
+        Вложенные вызовы входят во внешнюю транзакцию - так несколько записей
+        одного события (памп + сигнал) уходят на диск одним коммитом.
+        """
+        conn = self._get_connection()
+        # BEGIN/COMMIT - только у внешнего вызова потока. Флаг, а не conn.in_transaction:
+        # транзакция, оставшаяся открытой после сбоя, не должна выглядеть как внешняя
+        if getattr(self._local, 'in_transaction', False):
+            yield conn
+            return
+        conn.execute('BEGIN IMMEDIATE')
+        self._local.in_transaction = True
+        try:
+            try:
+                yield conn
+            except BaseException:
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+            try:
+                conn.execute('COMMIT')
+            except BaseException:
+                # SQLITE_BUSY/IOERR на COMMIT: откатываем, иначе соединение так и
+                # останется в транзакции и следующие записи потеряются
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                raise
+        finally:
+            self._local.in_transaction = False
+    
     def _create_tables(self):
         """Создать таблицы в БД если их нет"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
+        with self.transaction() as conn:
+            self._create_schema(conn.cursor())
+    
+    @staticmethod
+    def _create_schema(cursor: sqlite3.Cursor):
+        """DDL таблиц и индексов"""
         
         # Таблица обнаруженных пампов
         cursor.execute('''
@@ -52,42 +264,7 @@ class Database:
         ''')
         
         # Таблица сгенерированных сигналов
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS signals (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                pump_id INTEGER NOT NULL,
-                symbol TEXT NOT NULL,
-                generated_at TIMESTAMP NOT NULL,
-                entry_price REAL NOT NULL,
-                stop_loss REAL,
-                take_profit_1 REAL,
-                take_profit_2 REAL,
-                take_profit_3 REAL,
-                risk_reward_ratio REAL,
-                quality_score REAL NOT NULL,
-                
-                -- Факторы анализа
-                divergence_score REAL,
-                volume_drop_pct REAL,
-                orderbook_score REAL,
-                rsi_value REAL,
-                
-                -- Веса, использованные для этого сигнала
-                weights TEXT NOT NULL,
-                
-                -- Исходы (заполняются позже)
-                price_5m REAL,
-                price_15m REAL,
-                price_1h REAL,
-                price_4h REAL,
-                
-                -- Эффективность
-                was_profitable BOOLEAN,
-                max_profitable_pct REAL,
-                
-                FOREIGN KEY (pump_id) REFERENCES pumps (id)
-            )
-        ''')
+        cursor.execute(_SQL_CREATE_SIGNALS)
         
         # Таблица профилей монет
         cursor.execute('''
@@ -125,11 +302,54 @@ class Database:
         # Индексы для ускорения запросов
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_pumps_symbol ON pumps(symbol)')
         cursor.execute('CREATE INDEX IF NOT EXISTS idx_pumps_detected_at ON pumps(detected_at)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_signals_symbol ON signals(symbol)')
-        cursor.execute('CREATE INDEX IF NOT EXISTS idx_signals_generated_at ON signals(generated_at)')
+        for sql in _SQL_SIGNAL_INDEXES:
+            cursor.execute(sql)
+        # Префикс idx_signals_symbol_gen - отдельный индекс по symbol только замедляет запись
+        cursor.execute('DROP INDEX IF EXISTS idx_signals_symbol')
+        
+        for sql in _SQL_MIGRATE_TIMESTAMPS:
+            cursor.execute(sql)
         
-        conn.commit()
-        conn.close()
+        Database._migrate_schema(cursor)
+    
+    @staticmethod
+    def _migrate_schema(cursor: sqlite3.Cursor):
+        """Одноразовые миграции существующих БД (по PRAGMA user_version)"""
+        version = cursor.execute('PRAGMA user_version').fetchone()[0]
+        if version >= _SCHEMA_VERSION:
+            return
+        
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(signals)')}
+        # Недостающие колонки весов (v0 - все, v1 - weight_oi)
+        for column, _ in _SIGNAL_WEIGHT_COLUMNS:
+            if column not in columns:
+                cursor.execute(f'ALTER TABLE signals ADD COLUMN {column} REAL')
+        if 'weights' in columns:
+            # Старая схема: веса JSON-строкой - раскладываем по колонкам
+            cursor.execute('UPDATE signals SET ' + ', '.join(
+                f"{column} = json_extract(weights, '$.{key}')" for column, key in _SIGNAL_WEIGHT_COLUMNS
+            ) + " WHERE json_valid(weights)")
+            if _HAS_DROP_COLUMN:
+                cursor.execute('ALTER TABLE signals DROP COLUMN weights')
+            else:
+                Database._rebuild_signals(cursor)
+            logger.info("🗄️ Миграция БД: веса сигналов перенесены в отдельные колонки")
+        
+        cursor.execute(f'PRAGMA user_version = {_SCHEMA_VERSION}')
+    
+    @staticmethod
+    def _rebuild_signals(cursor: sqlite3.Cursor):
+        """Пересоздать signals по текущему DDL (create-copy-rename), перенеся общие колонки"""
+        cursor.execute('ALTER TABLE signals RENAME TO signals_old')
+        cursor.execute(_SQL_CREATE_SIGNALS)
+        old_columns = {row[1] for row in cursor.execute('PRAGMA table_info(signals_old)')}
+        columns = ', '.join(row[1] for row in cursor.execute('PRAGMA table_info(signals)')
+                            if row[1] in old_columns)
+        cursor.execute(f'INSERT INTO signals ({columns}) SELECT {columns} FROM signals_old')
+        # Индексы уходят вместе со старой таблицей - создаём заново на новой
+        cursor.execute('DROP TABLE signals_old')
+        for sql in _SQL_SIGNAL_INDEXES:
+            cursor.execute(sql)
     
     def add_pump(self, symbol: str, price_start: float, price_peak: float,
                  price_increase_pct: float, volume_spike: float,
@@ -140,31 +360,36 @@ class Database:
         Returns:
             ID добавленного пампа
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO pumps (symbol, detected_at, price_start, price_peak,
-                             price_increase_pct, volume_spike, timeframe_minutes, metadata)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            symbol,
-            datetime.now(),
-            price_start,
-            price_peak,
-            price_increase_pct,
-            volume_spike,
-            timeframe_minutes,
-            json.dumps(metadata) if metadata else None
-        ))
-        
-        pump_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        pump_id = self.add_pumps_bulk([(symbol, price_start, price_peak, price_increase_pct,
+                                        volume_spike, timeframe_minutes, metadata)])[0]
         
         logger.info(f"Памп добавлен в БД: {symbol} +{price_increase_pct:.1f}% (ID: {pump_id})")
         return pump_id
     
+    def add_pumps_bulk(self, rows: List[Tuple]) -> List[int]:
+        """
+        Добавить пачку пампов одной транзакцией (executemany)
+        
+        Args:
+            rows: кортежи (symbol, price_start, price_peak, price_increase_pct,
+                  volume_spike, timeframe_minutes, metadata)
+        
+        Returns:
+            ID добавленных пампов в порядке rows
+        """
+        if not rows:
+            return []
+        now = int(time.time())
+        params = [
+            (symbol, now, price_start, price_peak, price_increase_pct, volume_spike,
+             timeframe_minutes, json.dumps(metadata) if metadata else None)
+            for symbol, price_start, price_peak, price_increase_pct, volume_spike,
+                timeframe_minutes, metadata in rows
+        ]
+        with self.transaction() as conn:
+            conn.executemany(_SQL_INSERT_PUMP, params)
+            return self._inserted_ids(conn, len(params))
+    
     def add_signal(self, pump_id: int, symbol: str, entry_price: float,
                    stop_loss: float, take_profits: List[float],
                    risk_reward: float, quality_score: float,
@@ -175,50 +400,64 @@ class Database:
         Returns:
             ID добавленного сигнала
         """
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO signals (
-                pump_id, symbol, generated_at, entry_price, stop_loss,
-                take_profit_1, take_profit_2, take_profit_3,
-                risk_reward_ratio, quality_score,
-                divergence_score, volume_drop_pct, orderbook_score, rsi_value,
-                weights
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            pump_id, symbol, datetime.now(), entry_price, stop_loss,
-            take_profits[0] if len(take_profits) > 0 else None,
-            take_profits[1] if len(take_profits) > 1 else None,
-            take_profits[2] if len(take_profits) > 2 else None,
-            risk_reward, quality_score,
-            factors.get('divergence_score'),
-            factors.get('volume_drop_pct'),
-            factors.get('orderbook_score'),
-            factors.get('rsi_value'),
-            json.dumps(weights)
-        ))
-        
-        signal_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        signal_id = self.add_signals_bulk([(pump_id, symbol, entry_price, stop_loss, take_profits,
+                                            risk_reward, quality_score, factors, weights)])[0]
         
         logger.info(f"Сигнал добавлен: {symbol} @ {entry_price} (Качество: {quality_score:.1f}/10)")
         return signal_id
     
+    def add_signals_bulk(self, rows: List[Tuple]) -> List[int]:
+        """
+        Добавить пачку сигналов одной транзакцией (executemany)
+        
+        Args:
+            rows: кортежи (pump_id, symbol, entry_price, stop_loss, take_profits,
+                  risk_reward, quality_score, factors, weights)
+        
+        Returns:
+            ID добавленных сигналов в порядке rows
+        """
+        if not rows:
+            return []
+        now = int(time.time())
+        params = [
+            (
+                pump_id, symbol, now, entry_price, stop_loss,
+                take_profits[0] if len(take_profits) > 0 else None,
+                take_profits[1] if len(take_profits) > 1 else None,
+                take_profits[2] if len(take_profits) > 2 else None,
+                risk_reward, quality_score,
+                factors.get('divergence_score'),
+                factors.get('volume_drop_pct'),
+                factors.get('orderbook_score'),
+                factors.get('rsi_value'),
+                *[weights.get(key) for _, key in _SIGNAL_WEIGHT_COLUMNS]
+            )
+            for pump_id, symbol, entry_price, stop_loss, take_profits,
+                risk_reward, quality_score, factors, weights in rows
+        ]
+        with self.transaction() as conn:
+            conn.executemany(_SQL_INSERT_SIGNAL, params)
+            return self._inserted_ids(conn, len(params))
+    
+    @staticmethod
+    def _inserted_ids(conn: sqlite3.Connection, count: int) -> List[int]:
+        """
+        ID строк последнего executemany. Внутри одной транзакции запись
+        держит блокировку, и AUTOINCREMENT выдаёт ID подряд.
+        """
+        last_id = conn.execute(_SQL_LAST_INSERT_ID).fetchone()[0]
+        return list(range(last_id - count + 1, last_id + 1))
+    
     def update_signal_outcome(self, signal_id: int, price_5m: Optional[float] = None,
                             price_15m: Optional[float] = None, price_1h: Optional[float] = None,
                             price_4h: Optional[float] = None):
         """Обновить исход сигнала (цены через время)"""
         conn = self._get_connection()
-        cursor = conn.cursor()
         
         # Получаем текущий сигнал
-        cursor.execute('SELECT entry_price, stop_loss, take_profit_1 FROM signals WHERE id = ?', 
-                      (signal_id,))
-        row = cursor.fetchone()
+        row = conn.execute(_SQL_SIGNAL_LEVELS, (signal_id,)).fetchone()
         if not row:
-            conn.close()
             return
         
         entry_price = row['entry_price']
@@ -236,98 +475,45 @@ class Database:
             max_profit_pct = None
             was_profitable = None
         
-        cursor.execute('''
-            UPDATE signals
-            SET price_5m = ?, price_15m = ?, price_1h = ?, price_4h = ?,
-                was_profitable = ?, max_profitable_pct = ?
-            WHERE id = ?
-        ''', (price_5m, price_15m, price_1h, price_4h, was_profitable, max_profit_pct, signal_id))
-        
-        conn.commit()
-        conn.close()
+        with self.transaction():
+            conn.execute(_SQL_UPDATE_SIGNAL_OUTCOME, (price_5m, price_15m, price_1h, price_4h, was_profitable, max_profit_pct, signal_id))
     
     def get_coin_profile(self, symbol: str) -> Optional[Dict]:
         """Получить профиль монеты"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM coin_profiles WHERE symbol = ?', (symbol,))
-        row = cursor.fetchone()
-        conn.close()
+        row = self._get_connection().execute(_SQL_GET_COIN_PROFILE, (symbol,)).fetchone()
         
         if row:
             return dict(row)
         return None
     
     def update_coin_profile(self, symbol: str, profile_data: Dict):
-        """Обновить профиль монеты"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        # Проверяем существует ли профиль
-        existing = self.get_coin_profile(symbol)
-        
-        if existing:
-            # Обновляем существующий
-            set_clause = ", ".join([f"{k} = ?" for k in profile_data.keys()])
-            values = list(profile_data.values()) + [datetime.now(), symbol]
-            cursor.execute(f'''
-                UPDATE coin_profiles
-                SET {set_clause}, last_updated = ?
-                WHERE symbol = ?
-            ''', values)
-        else:
-            # Создаём новый
-            profile_data['symbol'] = symbol
-            profile_data['last_updated'] = datetime.now()
-            
-            columns = ", ".join(profile_data.keys())
-            placeholders = ", ".join(["?" for _ in profile_data])
-            cursor.execute(f'''
-                INSERT INTO coin_profiles ({columns})
-                VALUES ({placeholders})
-            ''', list(profile_data.values()))
-        
-        conn.commit()
-        conn.close()
+        """Обновить профиль монеты (один UPSERT вместо SELECT + UPDATE/INSERT)"""
+        # SQL зависит только от набора колонок (он у вызовов фиксирован) - из кэша;
+        # параметры - один кортеж без промежуточных списков
+        sql = _upsert_profile_sql(tuple(profile_data))
+        params = (symbol, int(time.time()), *profile_data.values())
+        
+        with self.transaction() as conn:
+            conn.execute(sql, params)
     
     def get_recent_signals(self, symbol: str, limit: int = 50) -> List[Dict]:
         """Получить недавние сигналы для монеты"""
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM signals
-            WHERE symbol = ?
-            ORDER BY generated_at DESC
-            LIMIT ?
-        ''', (symbol, limit))
-        
-        rows = cursor.fetchall()
-        conn.close()
+        rows = self._get_connection().execute(_SQL_RECENT_SIGNALS, (symbol, limit)).fetchall()
         
         return [dict(row) for row in rows]
     
+    def get_signal_by_id(self, signal_id: int) -> Optional[Dict]:
+        """Получить сигнал по ID (поиск по первичному ключу)"""
+        row = self._get_connection().execute(_SQL_SIGNAL_BY_ID, (signal_id,)).fetchone()
+        return dict(row) if row else None
+    
     def get_statistics(self, symbol: Optional[str] = None) -> Dict:
         """Получить статистику по сигналам"""
         conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        where_clause = "WHERE symbol = ?" if symbol else ""
-        params = (symbol,) if symbol else ()
-        
-        cursor.execute(f'''
-            SELECT
-                COUNT(*) as total_signals,
-                SUM(CASE WHEN was_profitable = 1 THEN 1 ELSE 0 END) as profitable_signals,
-                AVG(quality_score) as avg_quality,
-                AVG(max_profitable_pct) as avg_profit_pct
-            FROM signals
-            {where_clause}
-        ''', params)
-        
-        row = cursor.fetchone()
-        conn.close()
+        if symbol:
+            row = conn.execute(_SQL_STATS_BY_SYMBOL, (symbol,)).fetchone()
+        else:
+            row = conn.execute(_SQL_STATS_ALL).fetchone()
         
         return dict(row) if row else {}
     
@@ -336,15 +522,19 @@ class Database:
         if days <= 0:
             return
         
-        cutoff_date = datetime.now() - timedelta(days=days)
-        conn = self._get_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute('DELETE FROM pumps WHERE detected_at < ?', (cutoff_date,))
-        cursor.execute('DELETE FROM signals WHERE generated_at < ?', (cutoff_date,))
-        
-        deleted_pumps = cursor.rowcount
-        conn.commit()
-        conn.close()
+        cutoff_date = int(time.time()) - days * 86400
+        # Одна транзакция; сначала дочерние сигналы, потом пампы (порядок FK)
+        with self.transaction() as conn:
+            n_sig = conn.execute(_SQL_DELETE_OLD_SIGNALS, (cutoff_date,)).rowcount
+            n_pump = conn.execute(_SQL_DELETE_OLD_PUMPS, (cutoff_date,)).rowcount
         
-        logger.info(f"Удалено {deleted_pumps} старых записей (старше {days} дней)")
+        logger.info(f"Удалено пампов={n_pump}, сигналов={n_sig} (старше {days} дней)")
+    
+    def close(self):
+        """Закрыть все соединения (и текущего потока, и рабочих потоков to_thread)"""
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        # Потоки не держат закрытые соединения: новый вызов откроет своё заново
+        self._local = threading.local()
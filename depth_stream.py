@@ -0,0 +1,239 @@
+"""
+📡 MEXC DEPTH STREAM - локальный стакан через WebSocket
+
+Вместо REST-запроса /contract/depth на каждый сигнал держим в памяти
+стакан для монет, которые сейчас анализируются:
+- снапшот через REST при подписке
+- инкрементальные обновления push.depth (qty = 0 → уровень удалён)
+- обновления, пришедшие до снапшота, буферизуются и доигрываются поверх него
+- при разрыве версии - пересинхронизация снапшотом
+- стакан без обновлений дольше max_book_age считается протухшим (None → REST)
+
+В момент сигнала стакан - чтение из памяти, 0 RTT.
+"""
+
+import asyncio
+import aiohttp
+import orjson
+import time
+from typing import Dict, List, Optional, Set
+from logger import get_logger
+
+logger = get_logger()
+
+
+class MexcDepthStream:
+    """Поддерживает локальные стаканы для отслеживаемых монет"""
+
+    def __init__(self, ws_url: str = "wss://contract.mexc.com/edge",
+                 rest_url: str = "https://contract.mexc.com",
+                 ping_interval: int = 15,
+                 snapshot_limit: int = 50,
+                 max_book_age: float = 5.0):
+        self.ws_url = ws_url
+        self.rest_url = rest_url
+        self.ping_interval = ping_interval
+        self.snapshot_limit = snapshot_limit
+        self.reconnect_delay = 5  # секунд
+        self.max_book_age = max_book_age  # сек без обновлений - стакан не отдаём
+        self.max_pending = 1000  # предел буфера обновлений до снапшота на монету
+
+        # symbol -> {'asks': {price: qty}, 'bids': {price: qty}, 'version': int, 'updated': float}
+        self.local_books: Dict[str, Dict] = {}
+        self.watched: Set[str] = set()
+        self._watchers: Dict[str, int] = {}  # symbol -> число активных мониторов
+        self._pending: Dict[str, List[Dict]] = {}  # symbol -> push.depth, пришедшие до снапшота
+
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._ws = None
+        self.running = False
+
+    # ═══════════════════════════════════════════════════════════════
+    # ПОДПИСКИ
+    # ═══════════════════════════════════════════════════════════════
+
+    def watch(self, symbol: str):
+        """Начать вести стакан монеты (вызовы считаются: каждому watch - свой unwatch)"""
+        self._watchers[symbol] = self._watchers.get(symbol, 0) + 1
+        if symbol in self.watched:
+            return
+        self.watched.add(symbol)
+        if self._ws is not None and not self._ws.closed:
+            asyncio.create_task(self._subscribe(symbol))
+
+    def unwatch(self, symbol: str):
+        """Перестать вести стакан монеты, когда его отпустил последний монитор"""
+        count = self._watchers.get(symbol, 0) - 1
+        if count > 0:
+            self._watchers[symbol] = count
+            return
+        self._watchers.pop(symbol, None)
+        if symbol not in self.watched:
+            return
+        self.watched.discard(symbol)
+        self.local_books.pop(symbol, None)
+        self._pending.pop(symbol, None)
+        if self._ws is not None and not self._ws.closed:
+            asyncio.create_task(self._send({"method": "unsub.depth", "param": {"symbol": symbol}}))
+
+    async def _send(self, payload: Dict):
+        try:
+            await self._ws.send_json(payload)
+        except Exception as e:
+            logger.debug(f"Depth WS send error: {e}")
+
+    async def _subscribe(self, symbol: str):
+        # Буфер до отправки подписки: обновления могут прийти раньше снапшота
+        self._pending.setdefault(symbol, [])
+        await self._send({"method": "sub.depth", "param": {"symbol": symbol}})
+        await self._load_snapshot(symbol)
+
+    async def _load_snapshot(self, symbol: str):
+        """Снапшот стакана через REST - база для инкрементальных обновлений"""
+        self._pending.setdefault(symbol, [])
+        try:
+            url = f"{self.rest_url}/api/v1/contract/depth/{symbol}"
+            async with self.session.get(url, params={"limit": self.snapshot_limit}) as resp:
+                if resp.status == 200:
+                    data = orjson.loads(await resp.read())
+                    if data.get('success') and symbol in self.watched:
+                        ob = data.get('data', {})
+                        self.local_books[symbol] = {
+                            'asks': {float(a[0]): float(a[1]) for a in ob.get('asks', [])},
+                            'bids': {float(b[0]): float(b[1]) for b in ob.get('bids', [])},
+                            'version': ob.get('version', 0),
+                            'updated': time.monotonic()
+                        }
+                        # Доигрываем обновления, пришедшие пока грузился снапшот
+                        # (старые версии _apply_delta пропустит сам)
+                        pending = self._pending.pop(symbol, [])
+                        pending.sort(key=lambda d: d.get('version', 0))
+                        for delta in pending:
+                            if symbol not in self.local_books:
+                                break  # Разрыв версии - уже пересинхронизируемся
+                            self._apply_delta(symbol, delta)
+                        return
+        except Exception as e:
+            logger.debug(f"Depth snapshot error {symbol}: {e}")
+        # Снапшот не получен - буфер бесполезен; стакан появится при следующей ресинхронизации
+        if symbol not in self.local_books:
+            self._pending.pop(symbol, None)
+
+    # ═══════════════════════════════════════════════════════════════
+    # ОБРАБОТКА СООБЩЕНИЙ
+    # ═══════════════════════════════════════════════════════════════
+
+    def _apply_delta(self, symbol: str, data: Dict):
+        """Применить инкрементальное обновление push.depth"""
+        book = self.local_books.get(symbol)
+        if book is None:
+            # Ждём снапшот - копим обновления, чтобы доиграть их поверх него
+            pending = self._pending.get(symbol)
+            if pending is not None and len(pending) < self.max_pending:
+                pending.append(data)
+            return
+
+        version = data.get('version', 0)
+        if version <= book['version']:
+            return  # Уже учтено в снапшоте
+
+        if book['version'] and version != book['version'] + 1:
+            # Пропустили обновление - стакан невалиден, пересинхронизация
+            logger.debug(f"📡 {symbol}: разрыв версии стакана {book['version']} → {version}, ресинк")
+            del self.local_books[symbol]
+            self._pending[symbol] = []
+            asyncio.create_task(self._load_snapshot(symbol))
+            return
+
+        for side in ('asks', 'bids'):
+            levels = book[side]
+            for level in data.get(side, []):
+                price = float(level[0])
+                qty = float(level[1])
+                if qty == 0:
+                    levels.pop(price, None)
+                else:
+                    levels[price] = qty
+
+        book['version'] = version
+        book['updated'] = time.monotonic()
+
+    def get_book(self, symbol: str, limit: int = 50) -> Optional[Dict]:
+        """
+        Локальный стакан в формате REST: {'asks': [[price, qty], ...], 'bids': [...]}
+        asks по возрастанию цены, bids по убыванию. None если стакан не синхронизирован
+        или протух (поток обновлений стоит дольше max_book_age).
+        """
+        book = self.local_books.get(symbol)
+        if not book or not book['asks'] or not book['bids']:
+            return None
+        if time.monotonic() - book['updated'] > self.max_book_age:
+            return None
+
+        asks = sorted(book['asks'].items())[:limit]
+        bids = sorted(book['bids'].items(), reverse=True)[:limit]
+        return {
+            'asks': [[p, q] for p, q in asks],
+            'bids': [[p, q] for p, q in bids]
+        }
+
+    # ═══════════════════════════════════════════════════════════════
+    # ОСНОВНОЙ ЦИКЛ
+    # ═══════════════════════════════════════════════════════════════
+
+    async def _ping_loop(self, ws):
+        while not ws.closed:
+            await asyncio.sleep(self.ping_interval)
+            try:
+                await ws.send_json({"method": "ping"})
+            except Exception:
+                return
+
+    async def run(self, session: aiohttp.ClientSession):
+        """Подключиться и держать стаканы в актуальном состоянии (с реконнектом)"""
+        self.session = session
+        self.running = True
+        logger.info("📡 Depth Stream запущен")
+
+        while self.running:
+            ping_task = None
+            try:
+                async with session.ws_connect(self.ws_url, heartbeat=None) as ws:
+                    self._ws = ws
+                    ping_task = asyncio.create_task(self._ping_loop(ws))
+
+                    # Переподписка после реконнекта
+                    for symbol in list(self.watched):
+                        await self._subscribe(symbol)
+
+                    async for msg in ws:
+                        if msg.type != aiohttp.WSMsgType.TEXT:
+                            if msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                            continue
+
+                        payload = orjson.loads(msg.data)
+                        if payload.get('channel') == 'push.depth':
+                            symbol = payload.get('symbol')
+                            if symbol in self.watched:
+                                self._apply_delta(symbol, payload.get('data', {}))
+
+            except Exception as e:
+                logger.warning(f"📡 Depth WS ошибка: {e}")
+            finally:
+                self._ws = None
+                if ping_task:
+                    ping_task.cancel()
+                # Без потока обновлений стаканы протухают
+                self.local_books.clear()
+                self._pending.clear()
+
+            if self.running:
+                await asyncio.sleep(self.reconnect_delay)
+
+    def stop(self):
+        """Остановить поток"""
+        self.running = False
+        if self._ws is not None and not self._ws.closed:
+            asyncio.create_task(self._ws.close())
+        logger.info("🛑 Depth Stream остановлен")
@@ -3,18 +3,49 @@ DEX Price Analyzer - проверка цены на DexScreener
 Если цена MEXC > цена DEX = сигнал к шорту
 """
 
+import asyncio
 import aiohttp
+import orjson
+import time
 from typing import Optional, Dict
 from logger import get_logger
 
 logger = get_logger()
 
+_EMPTY: Dict = {}  # Заглушка для отсутствующих вложенных объектов (liquidity/volume)
+
 
 class DexAnalyzer:
     """Анализатор цен на DEX"""
     
-    def __init__(self):
+    def __init__(self, session: Optional[aiohttp.ClientSession] = None):
         self.dex_api = "https://api.dexscreener.com/latest/dex"
+        # Долгоживущая сессия: TCP/TLS до dexscreener переиспользуется между вызовами
+        self.session = session
+        self._own_session = session is None
+        
+        # ⚡ TTL-кеш цен: за секунды цена на DEX не меняется заметно
+        self.price_cache_ttl = 5.0     # сек
+        self.negative_cache_ttl = 2.0  # сек - для "не найден"/ошибок, чтобы не долбить API
+        self._price_cache = {}         # base_token -> (monotonic ts, результат или None)
+        self._inflight = {}            # base_token -> asyncio.Future текущего запроса
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Сессия (своя создаётся лениво при первом запросе)"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=32, ttl_dns_cache=300, enable_cleanup_closed=True)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=5)
+            )
+            self._own_session = True
+        return self.session
+    
+    async def close(self):
+        """Закрыть свою сессию (чужую, переданную снаружи, не трогаем)"""
+        if self._own_session and self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
     
     async def get_dex_price(self, symbol: str) -> Optional[Dict]:
         """
@@ -39,52 +70,87 @@ class DexAnalyzer:
         if base_token in skip_tokens:
             return None
         
+        cached = self._price_cache.get(base_token)
+        if cached is not None:
+            ts, result = cached
+            ttl = self.price_cache_ttl if result is not None else self.negative_cache_ttl
+            if time.monotonic() - ts < ttl:
+                return result
+        
+        # Одновременные запросы одной монеты ждут один HTTP-запрос
+        fut = self._inflight.get(base_token)
+        if fut is None:
+            fut = asyncio.ensure_future(self._fetch_dex_price(base_token))
+            self._inflight[base_token] = fut
+            fut.add_done_callback(lambda _: self._inflight.pop(base_token, None))
+        return await asyncio.shield(fut)
+    
+    async def _fetch_dex_price(self, base_token: str) -> Optional[Dict]:
+        """Запрос к DexScreener; результат (и промах) кладётся в кеш"""
+        result = await self._request_dex_price(base_token)
+        self._price_cache[base_token] = (time.monotonic(), result)
+        return result
+    
+    async def _request_dex_price(self, base_token: str) -> Optional[Dict]:
+        """Найти пару токена с наибольшей ликвидностью на DexScreener"""
         try:
-            async with aiohttp.ClientSession() as session:
-                # Поиск по токену
-                url = f"{self.dex_api}/search/?q={base_token}"
-                
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        
-                        pairs = data.get('pairs', [])
-                        if not pairs:
-                            logger.debug(f"DEX: {base_token} не найден")
-                            return None
-                        
-                        # Берем пару с наибольшей ликвидностью
-                        best_pair = max(pairs, key=lambda x: float(x.get('liquidity', {}).get('usd', 0) or 0))
-                        
-                        if not best_pair:
-                            return None
-                        
-                        price_usd = float(best_pair.get('priceUsd', 0))
-                        liquidity = float(best_pair.get('liquidity', {}).get('usd', 0) or 0)
-                        
-                        if price_usd == 0:
-                            return None
-                        
-                        # ФИЛЬТР: минимум $100k ликвидности для надёжности данных
-                        MIN_LIQUIDITY_USD = 100000
-                        if liquidity < MIN_LIQUIDITY_USD:
-                            logger.warning(f"⚠️ DEX {base_token}: ликвидность ${liquidity:,.0f} < ${MIN_LIQUIDITY_USD:,} (ненадёжно, пропускаем)")
-                            return None
-                        
-                        result = {
-                            "price": price_usd,
-                            "dex_name": best_pair.get('dexId', 'unknown'),
-                            "liquidity": liquidity,
-                            "volume_24h": float(best_pair.get('volume', {}).get('h24', 0) or 0),
-                            "chain": best_pair.get('chainId', 'unknown'),
-                            "pair_address": best_pair.get('pairAddress', '')
-                        }
-                        
-                        logger.info(f"✅ DEX {base_token}: ${price_usd:.6f} на {result['dex_name']} (ликв: ${liquidity:,.0f})")
-                        return result
+            session = await self._get_session()
+            # Поиск по токену
+            url = f"{self.dex_api}/search/?q={base_token}"
+            
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                if response.status == 200:
+                    data = orjson.loads(await response.read())
+                    
+                    pairs = data.get('pairs', [])
+                    if not pairs:
+                        logger.debug(f"DEX: {base_token} не найден")
+                        return None
+                    
+                    # Берем пару с наибольшей ликвидностью (один проход, ликвидность считаем раз на пару)
+                    best_pair = None
+                    best_liq = -1.0
+                    for pair in pairs:
+                        try:
+                            liq = float((pair.get('liquidity') or _EMPTY).get('usd') or 0.0)
+                        except (TypeError, ValueError):
+                            continue
+                        if liq > best_liq:
+                            best_liq = liq
+                            best_pair = pair
+                    
+                    if not best_pair:
+                        return None
+                    
+                    price_usd = float(best_pair.get('priceUsd', 0))
+                    liquidity = best_liq
+                    
+                    if price_usd == 0:
+                        return None
+                    
+                    # ФИЛЬТР: минимум $100k ликвидности для надёжности данных
+                    MIN_LIQUIDITY_USD = 100000
+                    if liquidity < MIN_LIQUIDITY_USD:
+                        logger.warning(f"⚠️ DEX {base_token}: ликвидность ${liquidity:,.0f} < ${MIN_LIQUIDITY_USD:,} (ненадёжно, пропускаем)")
+                        return None
+                    
+                    result = {
+                        "price": price_usd,
+                        "dex_name": best_pair.get('dexId', 'unknown'),
+                        "liquidity": liquidity,
+                        "volume_24h": float((best_pair.get('volume') or _EMPTY).get('h24') or 0),
+                        "chain": best_pair.get('chainId', 'unknown'),
+                        "pair_address": best_pair.get('pairAddress', '')
+                    }
+                    
+                    logger.info(f"✅ DEX {base_token}: ${price_usd:.6f} на {result['dex_name']} (ликв: ${liquidity:,.0f})")
+                    return result
         
-        except asyncio.TimeoutError:
-            logger.warning(f"DEX: Timeout для {base_token}")
+        except (asyncio.TimeoutError, aiohttp.ServerTimeoutError, aiohttp.ClientConnectorError) as e:
+            # Таймаут/нет соединения - обычная сетевая ситуация, без стектрейса
+            logger.warning(f"DEX: {type(e).__name__} для {base_token}")
+        except aiohttp.ClientError as e:
+            logger.warning(f"DEX: ошибка протокола для {base_token}: {e}")
         except Exception as e:
             logger.error(f"DEX ошибка для {base_token}: {e}")
         
@@ -115,24 +181,17 @@ class DexAnalyzer:
         
         # Score: чем больше спред, тем лучше для шорта
         # 0-2% = 0 score
-        # 2-5% = 5 score
-        # 5-10% = 8 score
+        # 2-5% = 0 → 5 линейно
+        # 5-10% = 5 → 8 линейно
         # 10%+ = 10 score
-        if spread_pct < 2:
-            score = 0
-        elif spread_pct < 5:
-            score = ((spread_pct - 2) / 3) * 5
-        elif spread_pct < 10:
-            score = 5 + ((spread_pct - 5) / 5) * 3
-        else:
-            score = 10
-        
-        # Отрицательный спред (CEX дешевле DEX) = 0 score
-        if not is_overvalued:
-            score = 0
+        # Кусочно-линейная функция без if/elif: сумма зажатых отрезков + скачок на 10%.
+        # Отрицательный спред (CEX дешевле DEX) сюда не доходит - все отрезки дают 0
+        score = (min(max(spread_pct - 2, 0.0), 3.0) * (5 / 3)
+                 + min(max(spread_pct - 5, 0.0), 5.0) * (3 / 5)
+                 + 2.0 * (spread_pct >= 10))
         
         return {
             "spread_pct": spread_pct,
             "is_overvalued_on_cex": is_overvalued,
-            "spread_score": min(score, 10.0)
+            "spread_score": score
         }
@@ -3,9 +3,13 @@ Divergence Detector - обнаружение дивергенций между 
 """
 
 from typing import List, Dict, Optional
-from scipy.signal import find_peaks
 import numpy as np
 from logger import get_logger
+from score_kernels import HAS_NUMBA, find_peaks_distance
+
+if not HAS_NUMBA:
+    # Без Numba питоновский цикл медленнее scipy - берём её find_peaks
+    from scipy.signal import find_peaks
 
 logger = get_logger()
 
@@ -45,10 +49,10 @@ class DivergenceDetector:
         
         try:
             # Находим пики в ценах
-            price_peaks_idx, _ = find_peaks(prices, distance=min_distance)
+            price_peaks_idx = self._find_peaks(prices, min_distance)
             
             # Находим пики в индикаторе
-            indicator_peaks_idx, _ = find_peaks(indicator_values, distance=min_distance)
+            indicator_peaks_idx = self._find_peaks(indicator_values, min_distance)
             
             if len(price_peaks_idx) < 2 or len(indicator_peaks_idx) < 2:
                 return None
@@ -136,6 +140,14 @@ class DivergenceDetector:
         """
         return self.detect_bearish_divergence(prices, macd_values)
     
+    @staticmethod
+    def _find_peaks(values, min_distance: int) -> np.ndarray:
+        """Индексы пиков (Numba-ядро, если есть, иначе scipy.signal.find_peaks)"""
+        arr = np.asarray(values, dtype=np.float64)
+        if HAS_NUMBA:
+            return find_peaks_distance(arr, min_distance)
+        return find_peaks(arr, distance=min_distance)[0]
+    
     def _find_closest_peak(self, target_idx: int, peak_indices: np.ndarray) -> Optional[int]:
         """
         Найти ближайший пик к целевому индексу
@@ -4,10 +4,19 @@ Funding Rate Analyzer - анализ funding rate для фьючерсов
 
 from typing import Dict, Optional
 import aiohttp
+import numpy as np
+import orjson
 from logger import get_logger
 
 logger = get_logger()
 
+# Шкала score по funding rate (в %): кусочно-линейная, точки излома
+# 0.01% = 2.0, 0.05% = 5.0, 0.10% = 7.0, 0.20%+ = 10.0.
+# Отрезок i: score = _SCORE_AT[i] + _SLOPES[i] * (rate - _BINS[i])
+_BINS = np.array([0.0, 0.01, 0.05, 0.10, 0.20])
+_SCORE_AT = np.array([0.0, 2.0, 5.0, 7.0, 10.0])
+_SLOPES = np.array([2.0 / 0.01, 3.0 / 0.04, 2.0 / 0.05, 3.0 / 0.10, 0.0])
+
 
 class FundingRateAnalyzer:
     """Класс для анализа funding rate на фьючерсах"""
@@ -21,6 +30,26 @@ class FundingRateAnalyzer:
         """
         self.mexc_client = mexc_client
         self.rest_url = mexc_client.rest_url
+        # Долгоживущая сессия вместо новой на каждый запрос (keep-alive, без TLS-рукопожатия)
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Сессия клиента MEXC, если она открыта, иначе своя (создаётся лениво)"""
+        shared = getattr(self.mexc_client, 'session', None)
+        if shared is not None and not shared.closed:
+            return shared
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=16, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=5)
+            )
+        return self._session
+    
+    async def close(self):
+        """Закрыть свою сессию (сессию клиента MEXC не трогаем)"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     async def get_funding_rate(self, symbol: str) -> Optional[Dict]:
         """
@@ -37,22 +66,22 @@ class FundingRateAnalyzer:
             }
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.rest_url}/api/v1/contract/funding_rate/{symbol}"
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        if data.get("success"):
-                            funding_data = data.get("data", {})
-                            
-                            funding_rate = float(funding_data.get("fundingRate", 0))
-                            
-                            return {
-                                "funding_rate": funding_rate,
-                                "funding_rate_pct": funding_rate * 100,  # В процентах
-                                "next_funding_time": funding_data.get("nextFundingTime", 0),
-                                "is_bullish": funding_rate > 0  # Положительный = много лонгов платят
-                            }
+            session = self._get_session()
+            url = f"{self.rest_url}/api/v1/contract/funding_rate/{symbol}"
+            async with session.get(url) as response:
+                if response.status == 200:
+                    data = orjson.loads(await response.read())
+                    if data.get("success"):
+                        funding_data = data.get("data", {})
+                        
+                        funding_rate = float(funding_data.get("fundingRate", 0))
+                        
+                        return {
+                            "funding_rate": funding_rate,
+                            "funding_rate_pct": funding_rate * 100,  # В процентах
+                            "next_funding_time": funding_data.get("nextFundingTime", 0),
+                            "is_bullish": funding_rate > 0  # Положительный = много лонгов платят
+                        }
         except Exception as e:
             logger.error(f"Ошибка получения funding rate для {symbol}: {e}")
         
@@ -73,31 +102,29 @@ class FundingRateAnalyzer:
             return 0.0
         
         funding_rate_pct = funding_data["funding_rate_pct"]
-        
-        # Если funding rate отрицательный (больше шортов) - не очень хорошо для шорта
-        if funding_rate_pct < 0:
-            return 0.0
-        
-        # Шкала scoring (положительный funding = хорошо для шорта):
-        # 0.01% (0.0001) = 2.0 score
-        # 0.05% (0.0005) = 5.0 score  
-        # 0.10% (0.001) = 7.0 score
-        # 0.20%+ (0.002+) = 10.0 score
-        
-        if funding_rate_pct >= 0.20:
-            score = 10.0
-        elif funding_rate_pct >= 0.10:
-            score = 7.0 + ((funding_rate_pct - 0.10) / 0.10) * 3.0
-        elif funding_rate_pct >= 0.05:
-            score = 5.0 + ((funding_rate_pct - 0.05) / 0.05) * 2.0
-        elif funding_rate_pct >= 0.01:
-            score = 2.0 + ((funding_rate_pct - 0.01) / 0.04) * 3.0
-        else:
-            score = (funding_rate_pct / 0.01) * 2.0
+        score = float(self.calculate_funding_scores(np.array([funding_rate_pct]))[0])
         
         logger.debug(f"Funding rate: {funding_rate_pct:.4f}% → Score: {score:.1f}/10")
         
-        return min(max(score, 0.0), 10.0)
+        return score
+    
+    @staticmethod
+    def calculate_funding_scores(rates_pct: np.ndarray) -> np.ndarray:
+        """
+        Score для шорта (0-10) сразу для массива funding rate (в %), без ветвлений:
+        отрезок шкалы ищется searchsorted, отрицательный funding даёт 0
+        
+        Args:
+            rates_pct: Funding rate в процентах (например, при ранжировании списка монет)
+            
+        Returns:
+            Массив score той же длины
+        """
+        rates_pct = np.asarray(rates_pct, dtype=np.float64)
+        seg = np.maximum(np.searchsorted(_BINS, rates_pct, side='right') - 1, 0)
+        scores = _SCORE_AT[seg] + _SLOPES[seg] * (rates_pct - _BINS[seg])
+        # Отрицательный funding (больше шортов) попадает в отрезок 0 со score < 0 → 0
+        return np.clip(scores, 0.0, 10.0)
     
     def format_funding_info(self, funding_data: Optional[Dict]) -> str:
         """
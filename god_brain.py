@@ -14,6 +14,7 @@
 
 import sqlite3
 import json
+import heapq
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
@@ -36,6 +37,8 @@ class GodBrain:
         
         # Кэш профилей для быстрого доступа
         self.coin_memory = {}  # symbol -> CoinMemory
+        self.top_coins_k = 10
+        self._top_heap = []  # min-heap (rank, symbol) лучших монет, размер <= top_coins_k
         self._load_all_profiles()
     
     def _init_database(self):
@@ -161,8 +164,46 @@ class GodBrain:
             self.coin_memory[profile['symbol']] = profile
         
         conn.close()
+        self._rebuild_top_coins()
         logger.info(f"🧠 Загружено {len(self.coin_memory)} профилей монет")
     
+    @staticmethod
+    def _coin_rank(profile: Dict) -> float:
+        """Рейтинг монеты для TOP: WR × количество сигналов"""
+        return (profile.get('win_rate') or 0) * (profile.get('total_signals') or 0)
+    
+    def _rebuild_top_coins(self):
+        """Полная пересборка TOP-K из coin_memory (O(N log K))"""
+        self._top_heap = heapq.nlargest(
+            self.top_coins_k,
+            ((self._coin_rank(p), sym) for sym, p in self.coin_memory.items())
+        )
+        heapq.heapify(self._top_heap)
+    
+    def _update_top_coins(self, symbol: str, old_rank: Optional[float]):
+        """Инкрементальное обновление TOP-K после изменения профиля монеты"""
+        rank = self._coin_rank(self.coin_memory[symbol])
+        in_top = any(sym == symbol for _, sym in self._top_heap)
+        
+        if in_top and old_rank is not None and rank < old_rank:
+            # Монета из TOP ухудшилась - её место может занять кто-то извне
+            self._rebuild_top_coins()
+            return
+        
+        if in_top:
+            self._top_heap = [(r, sym) for r, sym in self._top_heap if sym != symbol]
+            heapq.heapify(self._top_heap)
+        
+        if len(self._top_heap) < self.top_coins_k:
+            heapq.heappush(self._top_heap, (rank, symbol))
+        else:
+            heapq.heappushpop(self._top_heap, (rank, symbol))
+    
+    def get_top_coins(self, n: int = 3) -> List[Tuple[str, Dict]]:
+        """Лучшие монеты по WR × сигналы (из TOP-K, без сортировки всей памяти)"""
+        top = heapq.nlargest(n, self._top_heap)
+        return [(sym, self.coin_memory[sym]) for _, sym in top]
+    
     def record_signal(self, signal_data: Dict) -> int:
         """
         Записать новый сигнал в память.
@@ -380,6 +421,8 @@ class GodBrain:
         conn.close()
         
         # Обновляем кэш
+        old_profile = self.coin_memory.get(symbol)
+        old_rank = self._coin_rank(old_profile) if old_profile else None
         self.coin_memory[symbol] = {
             'symbol': symbol,
             'total_signals': total,
@@ -395,6 +438,7 @@ class GodBrain:
             'confidence_adjustment': confidence_adj,
             'recommended_action': recommended
         }
+        self._update_top_coins(symbol, old_rank)
         
         logger.info(f"🧠 {symbol}: Обновлён профиль | WR: {win_rate*100:.0f}% | TP1: {tp1_rate*100:.0f}% | Action: {recommended}")
     
@@ -824,53 +868,28 @@ class GodBrain:
             'has_data': True
         }
     
-    def get_smart_prediction(self, symbol: str, pump_pct: float, 
-                            combined_score: float, hour: int = None) -> Dict:
+    def _history_score(self, symbol: str, pump_pct: float, hour: int = None,
+                       reasoning: List[str] = None) -> Tuple[float, Dict]:
         """
-        🧠 SMART PREDICTION - Максимально умный прогноз.
-        
-        Комбинирует ВСЕ факторы:
-        - Историческая WR
-        - Weighted WR (с затуханием)
-        - Похожие сигналы
-        - Текущая серия
-        - Оптимальные условия
+        Часть SMART PREDICTION, зависящая только от истории монеты
+        (не от combined_score текущего сигнала).
         
         Returns:
-            {
-                'final_score': float (0-10),
-                'prediction': str ('STRONG_BUY', 'BUY', 'NEUTRAL', 'AVOID'),
-                'confidence': float (0-100%),
-                'factors': dict,
-                'reasoning': list[str]
-            }
+            (поправка к базовому score, данные для factors)
         """
         if hour is None:
             hour = datetime.now().hour
+        if reasoning is None:
+            reasoning = []
         
-        reasoning = []
-        
-        # 1. Базовый интеллект
         intel = self.get_coin_intelligence(symbol)
         base_wr = intel.get('win_rate', 0.5)
         total_signals = intel.get('total_signals', 0)
-        
-        # 2. Weighted WR
         weighted_wr = self.get_weighted_win_rate(symbol)
-        
-        # 3. Похожие сигналы
-        similar = self.find_similar_signals(symbol, pump_pct, combined_score, 5)
-        similar_wins = len([s for s in similar if s['final_result'] and s['final_result'].startswith('WIN')])
-        similar_wr = similar_wins / len(similar) if similar else 0.5
-        
-        # 4. Серия
         streak = self.get_streak_info(symbol)
-        
-        # 5. Оптимальные условия
         optimal = self.get_optimal_conditions(symbol)
         
-        # === SCORING ===
-        score = 5.0  # Базовый нейтральный
+        score = 0.0
         
         # Историческая WR (+/- 2)
         if base_wr >= 0.7:
@@ -890,14 +909,6 @@ class GodBrain:
             score -= 0.5
             reasoning.append(f"📉 Недавние сигналы хуже: {weighted_wr*100:.0f}%")
         
-        # Похожие сигналы
-        if similar and similar_wr >= 0.7:
-            score += 1.0
-            reasoning.append(f"🎯 Похожие сигналы работали: {similar_wr*100:.0f}% WR")
-        elif similar and similar_wr < 0.3:
-            score -= 1.0
-            reasoning.append(f"⚠️ Похожие сигналы НЕ работали: {similar_wr*100:.0f}% WR")
-        
         # Серия
         if streak['is_hot']:
             score += 0.5
@@ -918,6 +929,70 @@ class GodBrain:
                 score += 0.5
                 reasoning.append(f"⏰ Оптимальное время: {hour}:00 UTC")
         
+        return score, {
+            'base_wr': base_wr,
+            'weighted_wr': weighted_wr,
+            'total_signals': total_signals,
+            'streak': streak
+        }
+    
+    def get_max_final_score(self, symbol: str, pump_pct: float, hour: int = None) -> float:
+        """
+        ⚡ Верхняя граница final_score из get_smart_prediction ДО анализа.
+        
+        История монеты уже известна, а похожие сигналы и combined_score
+        дают максимум +1.0 каждый. Если даже так score не проходит порог -
+        сетевые анализаторы можно не запускать.
+        """
+        history_score, _ = self._history_score(symbol, pump_pct, hour)
+        return max(0, min(10, 5.0 + history_score + 1.0 + 1.0))
+    
+    def get_smart_prediction(self, symbol: str, pump_pct: float, 
+                            combined_score: float, hour: int = None) -> Dict:
+        """
+        🧠 SMART PREDICTION - Максимально умный прогноз.
+        
+        Комбинирует ВСЕ факторы:
+        - Историческая WR
+        - Weighted WR (с затуханием)
+        - Похожие сигналы
+        - Текущая серия
+        - Оптимальные условия
+        
+        Returns:
+            {
+                'final_score': float (0-10),
+                'prediction': str ('STRONG_BUY', 'BUY', 'NEUTRAL', 'AVOID'),
+                'confidence': float (0-100%),
+                'factors': dict,
+                'reasoning': list[str]
+            }
+        """
+        reasoning = []
+        
+        # 1-4. История монеты: WR, weighted WR, серия, оптимальные условия
+        history_score, history = self._history_score(symbol, pump_pct, hour, reasoning)
+        base_wr = history['base_wr']
+        weighted_wr = history['weighted_wr']
+        total_signals = history['total_signals']
+        streak = history['streak']
+        
+        # 5. Похожие сигналы
+        similar = self.find_similar_signals(symbol, pump_pct, combined_score, 5)
+        similar_wins = len([s for s in similar if s['final_result'] and s['final_result'].startswith('WIN')])
+        similar_wr = similar_wins / len(similar) if similar else 0.5
+        
+        # === SCORING ===
+        score = 5.0 + history_score  # Базовый нейтральный + история
+        
+        # Похожие сигналы
+        if similar and similar_wr >= 0.7:
+            score += 1.0
+            reasoning.append(f"🎯 Похожие сигналы работали: {similar_wr*100:.0f}% WR")
+        elif similar and similar_wr < 0.3:
+            score -= 1.0
+            reasoning.append(f"⚠️ Похожие сигналы НЕ работали: {similar_wr*100:.0f}% WR")
+        
         # Combined score бонус
         if combined_score >= 8:
             score += 1.0
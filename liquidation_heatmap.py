@@ -12,7 +12,9 @@
 - Цена часто идёт туда, где скопились ликвидации (маркет-мейкер собирает их)
 """
 
+import math
 import numpy as np
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 from collections import defaultdict
 import logging
@@ -20,6 +22,13 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _round_sig(x: float, sig: int = 6) -> float:
+    """Округление до sig значащих цифр (ключ кэша для цен любого масштаба)"""
+    if x <= 0:
+        return x
+    return round(x, sig - 1 - int(math.floor(math.log10(x))))
+
+
 class LiquidationHeatmap:
     """
     🔥 Анализатор ликвидаций.
@@ -45,6 +54,22 @@ class LiquidationHeatmap:
         """
         Рассчитать зоны ликвидаций относительно текущей цены.
         
+        Цены округляются до 6 значащих цифр и результат кэшируется:
+        один и тот же памп пересчитывается много раз подряд.
+        Возвращаемый dict общий для всех вызовов - не изменять.
+        """
+        return self._calculate_zones_cached(
+            _round_sig(current_price), _round_sig(peak_price), _round_sig(start_price)
+        )
+    
+    @lru_cache(maxsize=4096)
+    def _calculate_zones_cached(self,
+                                current_price: float,
+                                peak_price: float,
+                                start_price: float) -> Dict:
+        """
+        Расчёт зон ликвидаций (за кэшем).
+        
         Returns:
             {
                 "long_liq_zones": [...],  # Зоны ликвидации лонгов (ниже цены)
@@ -6,6 +6,7 @@ Listing Detector - автоматическое обнаружение новы
 import asyncio
 import aiohttp
 import json
+import orjson
 from datetime import datetime
 from pathlib import Path
 from typing import Set, Dict, Optional, Callable
@@ -28,6 +29,7 @@ class ListingDetector:
         self.on_new_listing = on_new_listing
         self.check_interval = 30  # секунд
         self.running = False
+        self.session: Optional[aiohttp.ClientSession] = None  # Общая сессия бота (передаётся в run)
         
         # Инициализация
         self.known_symbols: Set[str] = set()
@@ -66,27 +68,35 @@ class ListingDetector:
     
     async def fetch_contracts(self) -> Dict[str, dict]:
         """Получить все фьючерсные контракты с MEXC"""
+        close_session = False
+        session = self.session
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.api_url, timeout=15) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        if data.get('success'):
-                            contracts = {}
-                            for contract in data.get('data', []):
-                                symbol = contract.get('symbol', '')
-                                if symbol:
-                                    contracts[symbol] = {
-                                        'symbol': symbol,
-                                        'displayName': contract.get('displayName', ''),
-                                        'baseCoin': contract.get('baseCoin', ''),
-                                        'quoteCoin': contract.get('quoteCoin', ''),
-                                        'maxLeverage': contract.get('maxLeverage', 0),
-                                        'state': contract.get('state', 0),
-                                    }
-                            return contracts
+            if not session:
+                session = aiohttp.ClientSession()
+                close_session = True
+            
+            async with session.get(self.api_url, timeout=15) as resp:
+                if resp.status == 200:
+                    data = orjson.loads(await resp.read())
+                    if data.get('success'):
+                        contracts = {}
+                        for contract in data.get('data', []):
+                            symbol = contract.get('symbol', '')
+                            if symbol:
+                                contracts[symbol] = {
+                                    'symbol': symbol,
+                                    'displayName': contract.get('displayName', ''),
+                                    'baseCoin': contract.get('baseCoin', ''),
+                                    'quoteCoin': contract.get('quoteCoin', ''),
+                                    'maxLeverage': contract.get('maxLeverage', 0),
+                                    'state': contract.get('state', 0),
+                                }
+                        return contracts
         except Exception as e:
             logger.error(f"Ошибка получения контрактов: {e}")
+        finally:
+            if close_session:
+                await session.close()
         return {}
     
     async def check_new_listings(self) -> list:
@@ -135,8 +145,10 @@ class ListingDetector:
         
         return new_listings
     
-    async def run(self):
+    async def run(self, session: aiohttp.ClientSession = None):
         """Запустить мониторинг листингов"""
+        if session:
+            self.session = session
         self.running = True
         logger.info(f"🔍 Listing Detector запущен (интервал: {self.check_interval}с)")
         
@@ -34,6 +34,14 @@ except ImportError:
     logger.warning("🤖 ML Predictor: sklearn НЕ установлен, используем встроенный алгоритм")
 
 
+# Порядок признаков модели: колонки матрицы при обучении и предсказании
+ML_FEATURE_ORDER = (
+    'pump_pct', 'combined_score', 'god_eye_score', 'dominator_score',
+    'orderbook_score', 'oi_score', 'funding_score', 'btc_score',
+    'liq_score', 'pump_speed_minutes', 'hour'
+)
+
+
 class MLPredictor:
     """
     🤖 MACHINE LEARNING PREDICTOR
@@ -48,11 +56,7 @@ class MLPredictor:
         self.model_path = model_path
         self.model = None
         self.scaler = None
-        self.feature_names = [
-            'pump_pct', 'combined_score', 'god_eye_score', 'dominator_score',
-            'orderbook_score', 'oi_score', 'funding_score', 'btc_score', 
-            'liq_score', 'pump_speed_minutes', 'hour'
-        ]
+        self.feature_names = list(ML_FEATURE_ORDER)
         self.is_trained = False
         self.training_samples = 0
         
@@ -246,7 +250,7 @@ class MLPredictor:
             logger.error(f"Ошибка встроенного обучения: {e}")
             return False
     
-    def predict(self, signal_data: Dict) -> Dict:
+    def predict(self, signal_data) -> Dict:
         """
         Предсказать вероятность успеха сигнала.
         
@@ -258,6 +262,7 @@ class MLPredictor:
                 ...
                 'hour': int (optional)
             }
+            либо готовый вектор признаков (1, 11) в порядке ML_FEATURE_ORDER
         
         Returns:
             {
@@ -277,6 +282,13 @@ class MLPredictor:
                 'recommendation': 'Модель не обучена (нужно больше данных)'
             }
         
+        # Готовый вектор - без сборки из dict
+        if not isinstance(signal_data, dict):
+            features = signal_data
+            if HAS_SKLEARN and self.model and self.scaler:
+                return self._predict_sklearn(features)
+            return self._predict_builtin([float(v) for v in features[0]])
+        
         # Подготовка features
         hour = signal_data.get('hour', datetime.now().hour)
         features = [
@@ -303,7 +315,7 @@ class MLPredictor:
         try:
             import numpy as np
             
-            X = np.array([features])
+            X = features if isinstance(features, np.ndarray) else np.array([features])
             X_scaled = self.scaler.transform(X)
             
             prob = self.model.predict_proba(X_scaled)[0][1]  # P(WIN)
@@ -13,12 +13,18 @@ from logger import get_logger
 
 logger = get_logger()
 
+# Шаблоны URL источников (подставляется базовая монета)
+_NITTER_SEARCH_URL = "https://nitter.net/search?f=tweets&q=${}"  # $ - кэштег
+_GOOGLE_NEWS_URL = "https://news.google.com/rss/search?q={}+crypto&hl=en-US&gl=US&ceid=US:en"
+_COINGECKO_COIN_URL = "https://api.coingecko.com/api/v3/coins/{}"
+
 
 class NewsMonitor:
     """Мониторинг новостей из публичных источников"""
     
     def __init__(self):
         self.session = None
+        self._base_coin_cache: Dict[str, str] = {}  # BTC_USDT -> BTC (разбираем символ один раз)
         
         # Negative keywords для FUD detection
         self.negative_keywords = [
@@ -33,16 +39,23 @@ class NewsMonitor:
             'partnership', 'bull', 'moon', 'партнерство', 'запуск'
         ]
     
+    def _base(self, symbol: str) -> str:
+        """Базовая монета символа (BTC_USDT -> BTC), кешируется на время жизни процесса"""
+        base = self._base_coin_cache.get(symbol)
+        if base is None:
+            base = self._base_coin_cache[symbol] = symbol.replace('_USDT', '').replace('USDT', '')
+        return base
+    
     async def check_twitter_sentiment(self, symbol: str) -> Dict:
         """
         Парсинг Twitter через nitter (публичный frontend)
         Nitter.net - бесплатный Twitter без API
         """
         try:
-            clean_symbol = symbol.replace('_USDT', '').replace('USDT', '')
+            clean_symbol = self._base(symbol)
             
             # Используем nitter.net (публичный Twitter frontend)
-            url = f"https://nitter.net/search?f=tweets&q=${clean_symbol}"
+            url = _NITTER_SEARCH_URL.format(clean_symbol)
             
             async with self.session.get(url, timeout=10) as resp:
                 if resp.status != 200:
@@ -99,10 +112,10 @@ class NewsMonitor:
         Парсинг Google News через RSS (публичный, без API)
         """
         try:
-            clean_symbol = symbol.replace('_USDT', '').replace('USDT', '')
+            clean_symbol = self._base(symbol)
             
             # Google News RSS feed
-            url = f"https://news.google.com/rss/search?q={clean_symbol}+crypto&hl=en-US&gl=US&ceid=US:en"
+            url = _GOOGLE_NEWS_URL.format(clean_symbol)
             
             async with self.session.get(url, timeout=10) as resp:
                 if resp.status != 200:
@@ -156,10 +169,10 @@ class NewsMonitor:
         Возвращает возраст в днях
         """
         try:
-            clean_symbol = symbol.replace('_USDT', '').replace('USDT', '')
+            clean_symbol = self._base(symbol)
             
             # CoinGecko публичный API
-            url = f"https://api.coingecko.com/api/v3/coins/{clean_symbol.lower()}"
+            url = _COINGECKO_COIN_URL.format(clean_symbol.lower())
             
             async with self.session.get(url, timeout=10) as resp:
                 if resp.status != 200:
@@ -48,41 +48,27 @@ class OrderbookAnalyzer:
             return {}
         
         try:
-            # Конвертируем в массивы numpy
-            ask_prices = np.array([float(ask[0]) for ask in asks])
-            ask_quantities = np.array([float(ask[1]) for ask in asks])
-            bid_prices = np.array([float(bid[0]) for bid in bids])
-            bid_quantities = np.array([float(bid[1]) for bid in bids])
+            # Конвертируем в массивы numpy: один C-каст на сторону вместо float() на каждое поле
+            # (MEXC отдаёт [price, qty, count], цены бывают строками)
+            ask_arr = np.asarray(asks, dtype=np.float64)
+            bid_arr = np.asarray(bids, dtype=np.float64)
+            ask_prices, ask_quantities = ask_arr[:, 0], ask_arr[:, 1]
+            bid_prices, bid_quantities = bid_arr[:, 0], bid_arr[:, 1]
             
             # Общий объём
-            total_ask_volume = np.sum(ask_quantities)
-            total_bid_volume = np.sum(bid_quantities)
+            total_ask_volume = ask_quantities.sum()
+            total_bid_volume = bid_quantities.sum()
             total_volume = total_ask_volume + total_bid_volume
             
             if total_volume == 0:
                 return {}
             
-            # Находим крупные стены продаж (сопротивление)
-            resistance_levels = []
-            for i, (price, qty) in enumerate(zip(ask_prices, ask_quantities)):
-                pct_of_total = (qty / total_volume) * 100
-                if pct_of_total >= self.min_sell_wall_pct:
-                    resistance_levels.append({
-                        "price": float(price),
-                        "quantity": float(qty),
-                        "pct_of_total": float(pct_of_total)
-                    })
-            
-            # Находим крупные стены покупок (поддержка)
-            support_levels = []
-            for i, (price, qty) in enumerate(zip(bid_prices, bid_quantities)):
-                pct_of_total = (qty / total_volume) * 100
-                if pct_of_total >= self.min_sell_wall_pct:
-                    support_levels.append({
-                        "price": float(price),
-                        "quantity": float(qty),
-                        "pct_of_total": float(pct_of_total)
-                    })
+            # Находим крупные стены продаж (сопротивление) и покупок (поддержка):
+            # % от объёма и отбор - одной векторной операцией, dict только для стен
+            ask_pct = ask_quantities / total_volume * 100
+            bid_pct = bid_quantities / total_volume * 100
+            resistance_levels = self._walls(ask_prices, ask_quantities, ask_pct)
+            support_levels = self._walls(bid_prices, bid_quantities, bid_pct)
             
             # Bid/Ask дисбаланс
             # Положительный = больше покупателей, отрицательный = больше продавцов
@@ -111,6 +97,14 @@ class OrderbookAnalyzer:
             logger.error(f"Ошибка анализа ордербука: {e}")
             return {}
     
+    def _walls(self, prices: np.ndarray, quantities: np.ndarray, pct: np.ndarray) -> List[Dict]:
+        """Уровни, где объём >= min_sell_wall_pct от общего (в порядке стакана)"""
+        idx = np.flatnonzero(pct >= self.min_sell_wall_pct)
+        return [
+            {"price": price, "quantity": qty, "pct_of_total": p}
+            for price, qty, p in zip(prices[idx].tolist(), quantities[idx].tolist(), pct[idx].tolist())
+        ]
+    
     def find_nearest_resistance(self, orderbook_analysis: Dict, 
                                current_price: float) -> Optional[float]:
         """
@@ -181,13 +175,18 @@ class OrderbookAnalyzer:
         return min(score, 10.0)
     
     def track_whale_activity(self, current_orderbook: Dict, 
-                            previous_orderbook: Optional[Dict] = None) -> Dict:
+                            previous_orderbook: Optional[Dict] = None,
+                            current_analysis: Optional[Dict] = None,
+                            previous_analysis: Optional[Dict] = None) -> Dict:
         """
         Отслеживание активности китов (крупных игроков)
         
         Args:
             current_orderbook: Текущий ордербук
             previous_orderbook: Предыдущий ордербук для сравнения
+            current_analysis: Готовый analyze_orderbook() текущего ордербука
+                (если уже посчитан - стакан второй раз не разбираем)
+            previous_analysis: Готовый analyze_orderbook() предыдущего ордербука
             
         Returns:
             {
@@ -208,7 +207,8 @@ class OrderbookAnalyzer:
             return result
         
         try:
-            current_analysis = self.analyze_orderbook(current_orderbook, 0)  # price не важна здесь
+            if current_analysis is None:
+                current_analysis = self.analyze_orderbook(current_orderbook, 0)  # price не важна здесь
             
             if not current_analysis:
                 return result
@@ -224,8 +224,10 @@ class OrderbookAnalyzer:
                     logger.info(f"🐋 Обнаружена крупная стена продаж: {large_walls[0]['pct_of_total']:.1f}%")
             
             # Сравнение с предыдущим ордербуком
-            if previous_orderbook:
-                prev_analysis = self.analyze_orderbook(previous_orderbook, 0)
+            if previous_analysis is not None or previous_orderbook:
+                prev_analysis = previous_analysis
+                if prev_analysis is None:
+                    prev_analysis = self.analyze_orderbook(previous_orderbook, 0)
                 
                 if prev_analysis:
                     # Проверяем исчезновение buy support
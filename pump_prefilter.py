@@ -0,0 +1,90 @@
+"""
+📐 PUMP PREFILTER - векторный отбор кандидатов в пампы
+
+detect_pump - питоновский цикл по снимкам монеты, и гонять его для
+~1000 монет каждые 0.05 сек дорого. Здесь держим для всех монет
+матрицы high/low по временным корзинам (строка - монета, столбец -
+корзина кольцевого буфера) и одной NumPy-операцией на скан
+отбираем монеты, где рост в окне в принципе возможен:
+
+    (max - min) / min >= порог
+
+Рост от начала окна к пику никогда не больше (max - min) / min, поэтому
+фильтр ничего не теряет - он только отсекает заведомо спокойные монеты.
+"""
+
+import math
+import numpy as np
+from typing import Dict, List
+
+
+class PumpPrefilter:
+    """Кольцевые буферы high/low по корзинам времени для всех монет сразу"""
+
+    def __init__(self, window_minutes: float, min_increase_pct: float, bucket_seconds: float = 5.0):
+        self.bucket_ms = int(bucket_seconds * 1000)
+        # +1 корзина: окно почти никогда не начинается ровно на границе корзины
+        self.n_buckets = math.ceil(window_minutes * 60_000 / self.bucket_ms) + 1
+        self.threshold = min_increase_pct / 100
+
+        self._rows: Dict[str, int] = {}  # symbol -> строка матрицы
+        self._last_symbols: List[str] = []
+        self._idx = np.empty(0, dtype=np.intp)
+        self._identity = True  # порядок символов совпадает со строками - без fancy-индексации
+        self.highs = np.empty((0, self.n_buckets))
+        self.lows = np.empty((0, self.n_buckets))
+        self._bucket = None  # номер текущей корзины (ts_ms // bucket_ms)
+
+    def _row_index(self, symbols: List[str], prices: np.ndarray) -> np.ndarray:
+        """Строки матрицы для символов скана (новые монеты добавляются в конец)"""
+        if symbols == self._last_symbols:
+            return self._idx
+
+        new_prices = [price for symbol, price in zip(symbols, prices.tolist()) if symbol not in self._rows]
+        for symbol in symbols:
+            if symbol not in self._rows:
+                self._rows[symbol] = len(self._rows)
+        if new_prices:
+            # Вся история новой монеты - её первая цена (истории до листинга нет)
+            fill = np.repeat(np.asarray(new_prices)[:, None], self.n_buckets, axis=1)
+            self.highs = np.vstack((self.highs, fill))
+            self.lows = np.vstack((self.lows, fill))
+
+        self._last_symbols = list(symbols)
+        self._idx = np.fromiter((self._rows[s] for s in symbols), dtype=np.intp, count=len(symbols))
+        self._identity = len(self._idx) == len(self._rows) and bool(np.all(self._idx == np.arange(len(self._idx))))
+        return self._idx
+
+    def update(self, symbols: List[str], prices: np.ndarray, ts_ms: int) -> np.ndarray:
+        """
+        Учесть цены скана и вернуть маску кандидатов (по порядку symbols).
+        False - рост в окне точно ниже порога, detect_pump можно не вызывать.
+        """
+        idx = self._row_index(symbols, prices)
+        bucket = ts_ms // self.bucket_ms
+        col = bucket % self.n_buckets
+
+        if self._bucket is None or bucket - self._bucket >= self.n_buckets:
+            # Первый скан или долгий перерыв - всё окно устарело
+            self.highs[idx] = prices[:, None]
+            self.lows[idx] = prices[:, None]
+        elif bucket > self._bucket:
+            # Новая корзина (и пропущенные между сканами) начинается с текущей цены
+            for b in range(self._bucket + 1, bucket + 1):
+                c = b % self.n_buckets
+                self.highs[idx, c] = prices
+                self.lows[idx, c] = prices
+        else:
+            self.highs[idx, col] = np.maximum(self.highs[idx, col], prices)
+            self.lows[idx, col] = np.minimum(self.lows[idx, col], prices)
+        if self._bucket is None or bucket > self._bucket:
+            self._bucket = bucket
+
+        if self._identity:
+            hi = self.highs.max(axis=1)
+            lo = self.lows.min(axis=1)
+        else:
+            hi = self.highs[idx].max(axis=1)
+            lo = self.lows[idx].min(axis=1)
+        # Нулевая/битая цена - пусть решает detect_pump
+        return (hi - lo >= lo * self.threshold) | (lo <= 0)
@@ -0,0 +1,98 @@
+"""
+⚡ SCORE KERNELS - численные ядра для скоринга сигналов
+
+Компилируются Numba (@njit, numba в requirements.txt) - важно при
+оффлайн-реплее истории, где скоринг вызывается тысячи раз.
+Заглушка без Numba оставлена только чтобы бот запускался в урезанном
+окружении: там ядра работают как обычные Python-циклы.
+"""
+
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+    logger.warning("numba не установлена (pip install -r requirements.txt) - ядра скоринга без JIT")
+
+    def njit(*args, **kwargs):
+        """Заглушка: без Numba возвращаем функцию как есть"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True, fastmath=True)
+def aggregate_scores(scores: np.ndarray) -> float:
+    """Средний score по всем метрикам (0-10)"""
+    total = 0.0
+    for i in range(scores.shape[0]):
+        total += scores[i]
+    return total / scores.shape[0]
+
+
+@njit(cache=True, fastmath=True)
+def pct_diffs(levels: np.ndarray, entry_price: float) -> np.ndarray:
+    """% отклонения каждого уровня (SL/TP) от цены входа"""
+    out = np.empty(levels.shape[0])
+    for i in range(levels.shape[0]):
+        out[i] = (levels[i] - entry_price) / entry_price * 100.0
+    return out
+
+
+@njit(cache=True)
+def _local_maxima(x: np.ndarray) -> np.ndarray:
+    """Индексы локальных максимумов x; у плато - середина (левая при чётной длине)"""
+    n = x.shape[0]
+    peaks = np.empty(n // 2 + 1, dtype=np.int64)
+    count = 0
+    i = 1
+    while i < n - 1:
+        if x[i - 1] < x[i]:
+            i_ahead = i + 1
+            while i_ahead < n - 1 and x[i_ahead] == x[i]:
+                i_ahead += 1
+            if x[i_ahead] < x[i]:
+                peaks[count] = (i + i_ahead - 1) // 2
+                count += 1
+                i = i_ahead
+        i += 1
+    return peaks[:count]
+
+
+@njit(cache=True)
+def _select_by_distance(peaks: np.ndarray, order: np.ndarray, distance: int) -> np.ndarray:
+    """Отбор по расстоянию: от самого высокого пика (order - по возрастанию высоты) гасим соседей ближе distance"""
+    count = peaks.shape[0]
+    keep = np.ones(count, dtype=np.bool_)
+    for r in range(count - 1, -1, -1):
+        j = order[r]
+        if not keep[j]:
+            continue
+        k = j - 1
+        while k >= 0 and peaks[j] - peaks[k] < distance:
+            keep[k] = False
+            k -= 1
+        k = j + 1
+        while k < count and peaks[k] - peaks[j] < distance:
+            keep[k] = False
+            k += 1
+    return peaks[keep]
+
+
+def find_peaks_distance(x: np.ndarray, distance: int) -> np.ndarray:
+    """
+    Индексы локальных максимумов x не ближе distance друг к другу -
+    то же, что scipy.signal.find_peaks(x, distance=distance)[0]:
+    у плато берётся середина, из близких пиков остаётся более высокий.
+    Порядок по высоте - np.argsort вне JIT, как в scipy: при равных пиках
+    выбор совпадает со scipy (у Numba своя сортировка с другим порядком равных).
+    """
+    peaks = _local_maxima(x)
+    if distance <= 1 or peaks.shape[0] < 2:
+        return peaks
+    return _select_by_distance(peaks, np.argsort(x[peaks]), distance)
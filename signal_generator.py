@@ -3,7 +3,8 @@ Signal Generator - генерация торговых сигналов на ш
 ОПТИМИЗИРОВАННАЯ ВЕРСИЯ с Funding Rate, MTF, Whale Tracking
 """
 
-from typing import Dict, List, Optional
+import numpy as np
+from typing import Dict, List, Optional, Union
 from indicators import TechnicalIndicators
 from divergence_detector import DivergenceDetector
 from volume_analyzer import VolumeAnalyzer
@@ -46,13 +47,15 @@ class SignalGenerator:
         self.pattern_analyzer = HistoricalPatternAnalyzer()  # Исторические паттерны
         self.news_monitor = get_news_monitor()  # 📰 NEWS MONITOR
         
-        # Кэш для предыдущих ордербуков (для whale tracking)
-        self.previous_orderbooks = {}
+        # Разбор предыдущего ордербука по монете (для whale tracking) - хранится
+        # результат analyze_orderbook, чтобы не парсить тот же стакан на следующем тике
+        self.previous_orderbook_analyses = {}
+        self.funding_analyzer: Optional[FundingRateAnalyzer] = None  # Создаётся с первым mexc_client
         logger.info("✅ Signal Generator v4.0 (OI + Patterns + NEWS) loaded")
     
     async def generate_signal(self, symbol: str, pump_data: Dict,
-                             price_history: List[float],
-                             volume_history: List[float],
+                             price_history: Union[np.ndarray, List[float]],
+                             volume_history: Union[np.ndarray, List[float]],
                              klines: List[Dict],
                              orderbook: Optional[Dict] = None,
                              mexc_client = None) -> Optional[Dict]:
@@ -62,8 +65,8 @@ class SignalGenerator:
         Args:
             symbol: Символ пары
             pump_data: Данные о пампе
-            price_history: История цен
-            volume_history: История объёмов
+            price_history: История цен (np.ndarray или список)
+            volume_history: История объёмов (np.ndarray или список)
             klines: Список свечей с OHLCV данными
             orderbook: Ордербук (опционально)
             mexc_client: MEXC клиент для funding rate и MTF анализа
@@ -81,7 +84,7 @@ class SignalGenerator:
             logger.warning(f"❌ {symbol}: Критически мало данных (price_history={len(price_history)})")
             return None
         
-        current_price = price_history[-1]
+        current_price = float(price_history[-1])
         logger.debug(f"   Текущая цена: {current_price:.8f}")
         
         # 1. Рассчитываем технические индикаторы
@@ -146,15 +149,21 @@ class SignalGenerator:
             )
             
             # Whale tracking
-            prev_orderbook = self.previous_orderbooks.get(symbol)
-            whale_data = self.orderbook_analyzer.track_whale_activity(orderbook, prev_orderbook)
-            self.previous_orderbooks[symbol] = orderbook
+            # Текущий стакан уже разобран выше - передаём разбор, а не сырой стакан
+            whale_data = self.orderbook_analyzer.track_whale_activity(
+                orderbook,
+                current_analysis=orderbook_analysis,
+                previous_analysis=self.previous_orderbook_analyses.get(symbol)
+            )
+            self.previous_orderbook_analyses[symbol] = orderbook_analysis
         
         # 5. Funding Rate анализ
         funding_score = 0.0
         funding_data = None
         if mexc_client:
-            funding_analyzer = FundingRateAnalyzer(mexc_client)
+            if self.funding_analyzer is None or self.funding_analyzer.mexc_client is not mexc_client:
+                self.funding_analyzer = FundingRateAnalyzer(mexc_client)
+            funding_analyzer = self.funding_analyzer
             funding_data = await funding_analyzer.get_funding_rate(symbol)
             funding_score = funding_analyzer.calculate_funding_score(funding_data)
         
@@ -6,6 +6,8 @@ Signal Tracker - отслеживает результаты сигналов
 
 import asyncio
 import aiohttp
+import orjson
+import time
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from collections import defaultdict
@@ -35,10 +37,11 @@ class SignalTracker:
         
         self.running = False
         self.check_interval = 60  # Проверка каждую минуту
+        self.session: Optional[aiohttp.ClientSession] = None  # Общая сессия бота (передаётся в run)
     
     def add_signal(self, symbol: str, entry_price: float, peak_price: float, pump_pct: float):
         """Добавить сигнал для отслеживания"""
-        signal_id = f"{symbol}_{datetime.now().timestamp()}"
+        signal_id = f"{symbol}_{time.time()}"
         
         self.active_signals[signal_id] = {
             'signal_id': signal_id,
@@ -61,18 +64,26 @@ class SignalTracker:
     
     async def get_current_price(self, symbol: str) -> Optional[float]:
         """Получить текущую цену"""
+        close_session = False
+        session = self.session
         try:
-            async with aiohttp.ClientSession() as session:
-                url = f"{self.rest_url}/api/v1/contract/ticker"
-                params = {"symbol": symbol}
-                
-                async with session.get(url, params=params, timeout=10) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        if data.get('success') and data.get('data'):
-                            return float(data['data'].get('lastPrice', 0))
+            if not session:
+                session = aiohttp.ClientSession()
+                close_session = True
+            
+            url = f"{self.rest_url}/api/v1/contract/ticker"
+            params = {"symbol": symbol}
+            
+            async with session.get(url, params=params, timeout=10) as resp:
+                if resp.status == 200:
+                    data = orjson.loads(await resp.read())
+                    if data.get('success') and data.get('data'):
+                        return float(data['data'].get('lastPrice', 0))
         except Exception as e:
             logger.error(f"Ошибка получения цены {symbol}: {e}")
+        finally:
+            if close_session:
+                await session.close()
         return None
     
     async def check_signals(self):
@@ -199,8 +210,10 @@ class SignalTracker:
             'active_tracking': len(self.active_signals)
         }
     
-    async def run(self):
+    async def run(self, session: aiohttp.ClientSession = None):
         """Запустить фоновую проверку сигналов"""
+        if session:
+            self.session = session
         self.running = True
         logger.info("📊 Signal Tracker запущен")
         
@@ -12,6 +12,7 @@ Ultra-Smart SL/TP Calculator v3
 """
 
 import math
+import numpy as np
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
@@ -115,15 +116,19 @@ class UltraSmartCalculator:
             else:
                 speed_mult = 0.8  # Медленный - возможна проторговка
             
+            # Свечи -> float64 массив (N, 6): колонки [t, o, h, l, c, v]
+            klines = self._as_kline_array(klines)
+            has_klines = len(klines) > 0
+            
             # ===== 3. АНАЛИЗ ФОРМЫ СВЕЧИ (если есть данные) =====
             candle_mult = 1.0
             candle_info = ""
-            if klines and len(klines) > 0:
+            if has_klines:
                 candle_mult, candle_info = self._analyze_candle_structure(klines[-1])
             
             # ===== 4. ATR (ВОЛАТИЛЬНОСТЬ) =====
             atr_pct = 5.0  # Дефолт 5%
-            if klines and len(klines) >= 14:
+            if len(klines) >= 14:
                 atr_pct = self._calculate_atr_percent(klines, entry_price)
             
             # ===== 5. УРОВНИ ФИБОНАЧЧИ =====
@@ -138,7 +143,7 @@ class UltraSmartCalculator:
             cvd_mult = 1.0
             liq_targets = []
             
-            if self.advanced and klines:
+            if self.advanced and has_klines:
                 # Delta Volume
                 cvd_analysis = self.advanced.delta.calculate_from_klines(klines)
                 cvd_mult = self.advanced.delta.get_tp_multiplier(cvd_analysis)
@@ -174,7 +179,7 @@ class UltraSmartCalculator:
             god_eye_analysis = None
             god_eye_quality = "СТАНДАРТ"
             
-            if self.god_eye and klines:
+            if self.god_eye and has_klines:
                 god_eye_analysis = self.god_eye.analyze(symbol, klines, entry_price)
                 god_eye_mult = self.god_eye.get_tp_multiplier(god_eye_analysis)
                 god_eye_quality = self.god_eye.get_entry_quality(god_eye_analysis)
@@ -188,7 +193,7 @@ class UltraSmartCalculator:
             dominator_analysis = None
             domination_signal = "NEUTRAL"
             
-            if self.dominator and klines and orderbook:
+            if self.dominator and has_klines and orderbook:
                 dominator_analysis = self.dominator.dominate(
                     symbol=symbol,
                     klines=klines,
@@ -346,28 +351,36 @@ class UltraSmartCalculator:
             logger.debug(f"Ошибка анализа свечи: {e}")
             return 1.0, ""
     
-    def _calculate_atr_percent(self, klines: List, current_price: float) -> float:
-        """Рассчитать ATR как процент от текущей цены"""
+    def _calculate_atr_percent(self, klines: np.ndarray, current_price: float) -> float:
+        """Рассчитать ATR (по первым 15 свечам) как процент от текущей цены"""
         try:
-            trs = []
-            for i in range(1, min(15, len(klines))):
-                _, _, high, low, close_prev, _ = klines[i-1]
-                _, _, high_cur, low_cur, _, _ = klines[i]
-                
-                high, low = float(high_cur), float(low_cur)
-                close_prev = float(close_prev)
-                
-                tr = max(high - low, abs(high - close_prev), abs(low - close_prev))
-                trs.append(tr)
+            window = klines[:15]
+            high = window[1:, 2]
+            low = window[1:, 3]
+            close_prev = window[:-1, 4]
             
-            if trs:
-                atr = sum(trs) / len(trs)
-                return (atr / current_price) * 100
+            tr = np.maximum(high - low, np.maximum(np.abs(high - close_prev), np.abs(low - close_prev)))
+            
+            if tr.size:
+                return float(tr.mean() / current_price * 100)
         except Exception as e:
             logger.debug(f"Ошибка ATR: {e}")
         
         return 5.0  # Дефолт 5%
     
+    @staticmethod
+    def _as_kline_array(klines) -> np.ndarray:
+        """Свечи [[t, o, h, l, c, v], ...] или готовый массив -> float64 (N, 6)"""
+        if klines is None or len(klines) == 0:
+            return np.empty((0, 6))
+        try:
+            arr = np.asarray(klines, dtype=np.float64)
+            if arr.ndim == 2 and arr.shape[1] >= 6:
+                return arr
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Некорректный формат свечей: {e}")
+        return np.empty((0, 6))
+    
     def _adjust_to_liquidity(self, target: float, bids: List) -> float:
         """Притягиваем цель к ближайшей стенке в стакане (чуть выше неё)"""
         if not bids:
@@ -0,0 +1,99 @@
+"""
+Колонки весов сигнала: словарь SignalGenerator сохраняется целиком, в т.ч. при миграции
+"""
+
+import json
+import sqlite3
+
+import pytest
+
+import database
+from database import Database
+
+# Форма словаря весов из SignalGenerator.analyze_pump
+GENERATOR_WEIGHTS = {'rsi_level': 0.30, 'volume_drop': 0.30, 'orderbook': 0.20, 'oi_factor': 0.20}
+
+
+def _weights(db: Database, signal_id: int) -> dict:
+    row = db.get_signal_by_id(signal_id)
+    return {key: row[column] for column, key in database._SIGNAL_WEIGHT_COLUMNS if row[column] is not None}
+
+
+def _add_signal(db: Database, weights: dict) -> int:
+    pump_id = db.add_pump('BTC_USDT', 100.0, 110.0, 10.0, 3.0, 5)
+    return db.add_signal(pump_id, 'BTC_USDT', 110.0, 115.0, [105.0, 100.0, 95.0],
+                         2.0, 7.5, {'rsi_value': 80.0}, weights)
+
+
+def test_generator_weights_roundtrip(tmp_path):
+    db = Database(str(tmp_path / 'signals.db'))
+    try:
+        assert _weights(db, _add_signal(db, GENERATOR_WEIGHTS)) == GENERATOR_WEIGHTS
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize('drop_column', [True, False])
+def test_migration_keeps_generator_weights(tmp_path, monkeypatch, drop_column):
+    """БД до миграции: веса JSON-строкой в signals.weights (user_version = 0)"""
+    path = str(tmp_path / 'old.db')
+    old_ddl = database._SQL_CREATE_SIGNALS
+    for column, _ in database._SIGNAL_WEIGHT_COLUMNS:
+        old_ddl = old_ddl.replace(f'{column} REAL,', '')
+    old_ddl = old_ddl.replace('rsi_value REAL,', 'rsi_value REAL,\n        weights TEXT,')
+    conn = sqlite3.connect(path)
+    conn.execute(old_ddl)
+    conn.execute(
+        "INSERT INTO signals (pump_id, symbol, generated_at, entry_price, stop_loss, quality_score, weights) "
+        "VALUES (1, 'BTC_USDT', 0, 110.0, 115.0, 7.5, ?)",
+        (json.dumps(GENERATOR_WEIGHTS),)
+    )
+    conn.commit()
+    conn.close()
+
+    monkeypatch.setattr(database, '_HAS_DROP_COLUMN', drop_column and database._HAS_DROP_COLUMN)
+    db = Database(path)
+    try:
+        assert _weights(db, 1) == GENERATOR_WEIGHTS
+        assert _weights(db, _add_signal(db, GENERATOR_WEIGHTS)) == GENERATOR_WEIGHTS
+    finally:
+        db.close()
+
+
+class _FailingCommit:
+    """Соединение, у которого первый COMMIT падает как при SQLITE_BUSY"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self._conn = conn
+        self.fail = True
+
+    def execute(self, sql, *args):
+        if sql == 'COMMIT' and self.fail:
+            self.fail = False
+            raise sqlite3.OperationalError('database is locked')
+        return self._conn.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def test_failed_commit_rolls_back(tmp_path):
+    path = str(tmp_path / 'busy.db')
+    db = Database(path)
+    try:
+        conn = _FailingCommit(db._get_connection())
+        db._local.conn = conn
+        with pytest.raises(sqlite3.OperationalError):
+            db.add_pump('BTC_USDT', 100.0, 110.0, 10.0, 3.0, 5)
+        assert not conn.in_transaction
+
+        # Следующая запись снова коммитится (а не уходит во «вложенную» ветку)
+        pump_id = db.add_pump('ETH_USDT', 10.0, 11.0, 10.0, 3.0, 5)
+        reader = sqlite3.connect(path)
+        try:
+            assert reader.execute('SELECT symbol FROM pumps').fetchall() == [('ETH_USDT',)]
+            assert reader.execute('SELECT id FROM pumps').fetchone()[0] == pump_id
+        finally:
+            reader.close()
+    finally:
+        db.close()
@@ -0,0 +1,63 @@
+"""
+Паритет find_peaks_distance со scipy.signal.find_peaks(distance=...)
+"""
+
+import numpy as np
+import pytest
+
+scipy_signal = pytest.importorskip("scipy.signal")
+
+from score_kernels import find_peaks_distance
+
+def _py_find_peaks_distance(x, distance):
+    """Тот же алгоритм на питоновских исходниках ядер (путь без Numba)"""
+    from score_kernels import _local_maxima, _select_by_distance
+    local_maxima = getattr(_local_maxima, 'py_func', _local_maxima)
+    select = getattr(_select_by_distance, 'py_func', _select_by_distance)
+    peaks = local_maxima(x)
+    if distance <= 1 or peaks.shape[0] < 2:
+        return peaks
+    return select(peaks, np.argsort(x[peaks]), distance)
+
+
+KERNELS = [find_peaks_distance, _py_find_peaks_distance]
+
+
+def _series(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Случайный ряд с плато и одинаковыми по высоте пиками (грубое квантование)"""
+    kind = rng.integers(3)
+    if kind == 0:
+        return rng.normal(size=n)
+    if kind == 1:
+        return rng.integers(0, 5, size=n).astype(np.float64)
+    # Случайное блуждание с повторами значений - длинные плато
+    steps = rng.choice([-1.0, 0.0, 0.0, 1.0], size=n)
+    return np.round(np.cumsum(steps) * 0.5, 1)
+
+
+@pytest.mark.parametrize("kernel", KERNELS)
+def test_matches_scipy_on_random_series(kernel):
+    rng = np.random.default_rng(42)
+    for _ in range(3000):
+        n = int(rng.integers(0, 250))
+        x = _series(rng, n)
+        distance = int(rng.integers(1, 12))
+        expected = scipy_signal.find_peaks(x, distance=distance)[0]
+        np.testing.assert_array_equal(kernel(x, distance), expected)
+
+
+@pytest.mark.parametrize("kernel", KERNELS)
+def test_plateau_and_tie_cases(kernel):
+    cases = [
+        [0, 1, 1, 1, 0],              # плато - середина
+        [0, 1, 1, 0, 1, 1, 0],        # плато чётной длины - левая середина
+        [0, 2, 0, 2, 0, 2, 0],        # равные пики ближе distance
+        [1, 1, 1, 1],                 # плоский ряд - пиков нет
+        [0, 1, 1],                    # плато до края - не пик
+        [3, 0, 2, 0, 3],              # края не пики
+    ]
+    for values in cases:
+        x = np.asarray(values, dtype=np.float64)
+        for distance in (1, 2, 3, 5):
+            expected = scipy_signal.find_peaks(x, distance=distance)[0]
+            np.testing.assert_array_equal(kernel(x, distance), expected)
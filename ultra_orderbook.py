@@ -160,26 +160,29 @@ class UltraOrderbook:
     
     def _find_walls(self, prices, qtys, is_ask: bool) -> List[Dict]:
         """Находит стены (крупные ордера)."""
-        total = np.sum(qtys)
+        total = float(np.sum(qtys))
         if total == 0:
             return []
         
-        walls = []
         threshold = self.min_wall_pct / 100 * total
-        
-        for i, (price, qty) in enumerate(zip(prices, qtys)):
-            if qty >= threshold:
-                pct = (qty / total) * 100
-                walls.append({
-                    "price": float(price),
-                    "quantity": float(qty),
-                    "pct_of_total": float(pct),
-                    "type": "SELL" if is_ask else "BUY"
-                })
-        
-        # Сортируем по объёму (самые крупные первые)
-        walls.sort(key=lambda x: x["quantity"], reverse=True)
-        return walls[:5]  # Топ 5
+        idx = np.flatnonzero(qtys >= threshold)
+        
+        # Топ-5 по объёму: частичный отбор O(n) вместо полной сортировки,
+        # затем сортируем только эти пять (крупнейшие первые, при равенстве - по стакану)
+        if idx.size > 5:
+            idx = np.sort(idx[np.argpartition(qtys[idx], -5)[-5:]])
+        idx = idx[np.argsort(-qtys[idx], kind='stable')]
+        
+        side = "SELL" if is_ask else "BUY"
+        return [
+            {
+                "price": price,
+                "quantity": qty,
+                "pct_of_total": qty / total * 100,
+                "type": side
+            }
+            for price, qty in zip(prices[idx].tolist(), qtys[idx].tolist())
+        ]
     
     def _analyze_spread(self, ask_prices, bid_prices, current_price) -> Dict:
         """Анализ спреда."""